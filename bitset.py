@@ -0,0 +1,67 @@
+import numpy as np
+from tec import IndexedTEC
+
+
+""" Sets of dataset points represented as bitsets over the indices of the points in a dataset.
+    A bitset is a Python integer whose ith bit is set when the ith point of the dataset belongs
+    to the set, so unions, intersections and differences of point sets are computed a machine word
+    at a time instead of one vector at a time. """
+
+
+def from_indices(indices, size):
+    """ Returns the bitset of the dataset indices. size is the number of points in the dataset. """
+
+    flags = np.zeros(size, dtype=bool)
+    flags[np.asarray(indices, dtype=np.int64)] = True
+    return int.from_bytes(np.packbits(flags, bitorder='little').tobytes(), 'little')
+
+
+def to_indices(bits):
+    """ Returns the indices of the set bits in ascending order. """
+
+    if bits == 0:
+        return []
+
+    flags = np.unpackbits(np.frombuffer(bits.to_bytes((bits.bit_length() + 7) // 8, 'little'), dtype=np.uint8),
+                          bitorder='little')
+    return np.flatnonzero(flags).tolist()
+
+
+def popcount(bits):
+    """ Returns the number of points in the bitset. """
+    return bits.bit_count()
+
+
+def union(bits1, bits2):
+    return bits1 | bits2
+
+
+def intersection(bits1, bits2):
+    return bits1 & bits2
+
+
+def and_not(bits1, bits2):
+    """ Returns the points of bits1 that are not in bits2. """
+    return bits1 & ~bits2
+
+
+def contains(bits, index):
+    return (bits >> index) & 1 == 1
+
+
+def of_points(points, dataset):
+    """ Returns the bitset of the points, which must all belong to the dataset. """
+
+    indices = [dataset.index_of(p) for p in points]
+    return from_indices(indices, len(dataset))
+
+
+def coverage(tec, dataset):
+    """ Returns the bitset of the points covered by the TEC. The covered points must belong to the dataset,
+        which holds for the TECs computed from the dataset and their conjugates. The coverage of an IndexedTEC
+        of the same dataset without repeated points is computed from its indices without materializing the points. """
+
+    if isinstance(tec, IndexedTEC) and tec.get_dataset() is dataset and dataset.has_unique_vectors():
+        return from_indices(tec.coverage_indices(), len(dataset))
+
+    return of_points(tec.coverage(), dataset)
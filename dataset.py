@@ -1,18 +1,31 @@
 import csv
+import numpy as np
+from fractions import Fraction
+from math import lcm
 from vector import Vector
 from copy import deepcopy
 
 
+# Largest denominator considered when detecting the grid resolution of a dataset.
+MAX_RESOLUTION_DENOMINATOR = 2 ** 16
+
+# Quantized components are limited so that differences of them fit into 64 bit integers.
+MAX_QUANTIZED_COMPONENT = 2 ** 62
+
+
 class Dataset:
     """ Class for representing a multidimensional dataset. """
 
     _vectors = []
     _name = ''
+    _cache = None
+    _resolution = None
 
     def __init__(self, filename):
         """ Create a multidimensional dataset by reading the vectors from a .csv file. """
 
         self._vectors = self.dataset_from_file(filename)
+        self._cache = {}
 
         split_path = filename.split('/')
         self._name = split_path[len(split_path) - 1]
@@ -59,9 +72,210 @@ class Dataset:
         for vec in vectors:
             self._vectors.remove(vec)
 
+        self._cache = {}
+
+    def get_cached(self, key, compute):
+        """ Returns a value derived from the vectors of the dataset. The value is computed
+            by calling compute(dataset) on first use and cached until the dataset is modified. """
+
+        if key not in self._cache:
+            self._cache[key] = compute(self)
+
+        return self._cache[key]
+
+    def index_of(self, vector):
+        """ Returns the index of the first occurrence of the vector in the dataset.
+            Raises ValueError if the vector is not in the dataset. """
+
+        indices = self.get_cached('indices', _compute_indices)
+        if vector not in indices:
+            raise ValueError(str(vector) + ' is not in the dataset')
+
+        return indices[vector]
+
+    def indices_of(self, vectors):
+        """ Returns the indices of the first occurrences of the vectors in the dataset as an array,
+            with -1 for the vectors that are not in the dataset. """
+
+        indices = self.get_cached('indices', _compute_indices)
+        return np.array([indices.get(vector, -1) for vector in vectors], dtype=np.int64)
+
+    def index_map(self):
+        """ Returns a dictionary from each vector of the dataset to the index of its first occurrence.
+            The dictionary is cached in the dataset, so it must not be modified. """
+        return self.get_cached('indices', _compute_indices)
+
+    def has_unique_vectors(self):
+        """ Returns True if no vector occurs more than once in the dataset. """
+        return len(self.get_cached('indices', _compute_indices)) == len(self)
+
+    def is_sorted(self):
+        """ Returns True if the vectors are in ascending lexicographical order. """
+        return self.get_cached('is_sorted', _compute_is_sorted)
+
+    def has_exact_differences(self):
+        """ Returns True if the difference vectors of the points are computed exactly. This is the case
+            for quantized datasets and for components on a grid whose resolution is a power of two, such as
+            1/4, but not for decimal grids, such as 1/10, whose floats differ by rounding errors. """
+        return self.get_cached('has_exact_differences', _compute_has_exact_differences)
+
+    def is_quantized(self):
+        """ Returns True if the components of the vectors are integer multiples of a grid resolution. """
+        return self._resolution is not None
+
+    def get_resolution(self):
+        """ Returns the grid resolution of each dimension of a quantized dataset. """
+        return self._resolution
+
+    def dequantize(self, vector):
+        """ Returns a vector (a point, difference vector or translator) of the dataset
+            expressed in the original coordinates. """
+
+        if not self.is_quantized():
+            return vector
+
+        return Vector([dequantize_component(c, r) for c, r in zip(vector.components(), self._resolution)])
+
+    @staticmethod
+    def quantize(dataset, resolution=None):
+        """ Returns a copy of the dataset where the components of the vectors are integers that
+            express the components as multiples of the grid resolution, so that the difference vectors
+            are computed exactly. resolution is either a single step for all dimensions or a list
+            of steps, one for each dimension. If it is not given, the resolution 1/m with the smallest
+            integer m that represents every component exactly is detected for each dimension. """
+
+        dataset_copy = deepcopy(dataset)
+        dataset_copy._cache = {}
+
+        if not dataset_copy._vectors:
+            return dataset_copy
+
+        dim = dataset_copy._vectors[0].dimensionality()
+        if resolution is None:
+            resolution = detect_resolution(dataset_copy._vectors)
+        elif not isinstance(resolution, (list, tuple)):
+            resolution = [resolution for _ in range(dim)]
+
+        resolution = tuple(resolution)
+        if len(resolution) != dim:
+            raise ValueError('Resolution must be given for all ' + str(dim) + ' dimensions')
+
+        quantized_vectors = []
+        for vector in dataset_copy._vectors:
+            components = []
+            for component, step in zip(vector.components(), resolution):
+                components.append(quantize_component(component, step))
+
+            quantized_vectors.append(Vector(components))
+
+        dataset_copy._vectors = quantized_vectors
+        dataset_copy._resolution = resolution
+        return dataset_copy
+
+    @staticmethod
+    def from_vectors(vectors, name=''):
+        """ Creates a dataset of the vectors without reading them from a file. """
+
+        dataset = Dataset.__new__(Dataset)
+        dataset._vectors = list(vectors)
+        dataset._cache = {}
+        dataset._name = name
+        return dataset
+
     @staticmethod
     def sort_ascending(dataset):
         """ Returns a copy of the dataset in ascending lexicographical order. """
         dataset_copy = deepcopy(dataset)
         dataset_copy._vectors.sort()
-        return dataset_copy
\ No newline at end of file
+        dataset_copy._cache = {}
+        return dataset_copy
+
+
+def dataset_to_array(d):
+    """ Returns the vectors of dataset d as an (n, k) NumPy array. The array holds 64 bit integers
+        for quantized datasets and 64 bit floats otherwise. The array is cached in the dataset. """
+
+    return d.get_cached('array', _compute_array)
+
+
+def _compute_array(d):
+    if len(d) == 0:
+        return np.zeros((0, 0))
+
+    dtype = np.int64 if d.is_quantized() else np.float64
+    return np.array([v.components() for v in d], dtype=dtype)
+
+
+def _compute_is_sorted(d):
+    for i in range(1, len(d)):
+        if d[i] < d[i - 1]:
+            return False
+
+    return True
+
+
+def _compute_indices(d):
+    indices = {}
+    for i in range(len(d) - 1, -1, -1):
+        indices[d[i]] = i
+
+    return indices
+
+
+def _compute_has_exact_differences(d):
+    if d.is_quantized() or len(d) == 0:
+        return True
+
+    try:
+        resolution = detect_resolution(d)
+    except ValueError:
+        return False
+
+    # The resolutions are 1/m, and the floats of the multiples of 1/m are exact if m is a power of two.
+    return all(round(1 / step) & (round(1 / step) - 1) == 0 for step in resolution)
+
+
+def detect_resolution(vectors):
+    """ Finds for each dimension the resolution 1/m with the smallest integer m such that
+        every component of the vectors in that dimension is an integer multiple of it. The components
+        are compared with the fractions closest to them, so that floats such as 0.1 and 1/3 are on grids. """
+
+    resolution = []
+    for i in range(vectors[0].dimensionality()):
+        multiplier = 1
+        for vector in vectors:
+            fraction = Fraction(vector[i]).limit_denominator(MAX_RESOLUTION_DENOMINATOR)
+            multiplier = lcm(multiplier, fraction.denominator)
+            if abs(fraction - Fraction(vector[i])) > 1e-12 * max(1, abs(vector[i])) \
+                    or multiplier > MAX_RESOLUTION_DENOMINATOR:
+                raise ValueError('Component ' + str(vector[i]) + ' is not on a grid with resolution of at least 1/'
+                                 + str(MAX_RESOLUTION_DENOMINATOR))
+
+        resolution.append(float(Fraction(1, multiplier)))
+
+    return resolution
+
+
+def quantize_component(component, step):
+    """ Returns the component as an integer multiple of step. """
+
+    quantized = round(component / step)
+    if abs(quantized * step - component) > 1e-9 * max(1, abs(component)):
+        raise ValueError('Component ' + str(component) + ' is not a multiple of the resolution ' + str(step))
+
+    if abs(quantized) >= MAX_QUANTIZED_COMPONENT:
+        raise ValueError('Component ' + str(component) + ' is too large for resolution ' + str(step))
+
+    return quantized
+
+
+def dequantize_component(quantized, step):
+    """ Returns the component that is the integer multiple quantized of step. A multiple of a resolution 1/m
+        is computed as quantized / m, which gives the float closest to the decimal component, as 0.1 * 3
+        does not give 0.3. """
+
+    multiplier = round(1 / step)
+    if multiplier > 0 and 1 / multiplier == step:
+        return quantized / multiplier
+
+    return quantized * step
@@ -121,6 +121,18 @@ def tec_in_list(tec, list_of_tecs):
     return False
 
 
+def assert_tecs_equal(test_case, tecs, expected_tecs, compare_indices=False):
+    """ Asserts in test_case that tecs has the patterns and translators of expected_tecs in the same order.
+        If compare_indices is True, the pattern indices must also be the same. """
+
+    test_case.assertEqual(len(tecs), len(expected_tecs))
+    for tec, exp in zip(tecs, expected_tecs):
+        test_case.assertEqual(tec.get_pattern(), exp.get_pattern())
+        if compare_indices:
+            test_case.assertEqual(tec.get_pattern_indices(), exp.get_pattern_indices())
+        test_case.assertEqual(tec.get_translators(), exp.get_translators())
+
+
 def get_tecs_for_Meredith2002_fig11():
     exp_res = []
     exp_res.append(TEC([Vector([1, 3])], [], [Vector([0, -2]), Vector([0, 0]), Vector([1, -2]),
@@ -1,3 +1,8 @@
+from bisect import bisect_left, bisect_right
+from dataset import Dataset
+from range_count_index import range_count_index
+
+
 def bounding_box_compactness(tec, sorted_dataset):
     """ Computes the fraction of points belonging to the pattern in
         the closed minimum bounding box of the pattern. """
@@ -11,26 +16,31 @@ def bounding_box_compactness(tec, sorted_dataset):
     selection_begin = tec.get_pattern_indices()[0]
     selection_end = tec.get_pattern_indices()[pattern_size - 1]
 
-    # Extend selection in case there are points that have the same first component
-    # as the minimum or maximum vectors.
-    for i in range(selection_end, len(sorted_dataset)):
-        if sorted_dataset[selection_end] <= max_vector:
-            selection_end += 1
-        else:
-            break
-
-    for i in range(selection_begin, 0, -1):
-        if sorted_dataset[selection_begin] >= min_vector:
-            selection_begin -= 1
-        else:
-            break
-
-    selection_from_data = sorted_dataset[selection_begin:selection_end]
-    num_points_in_bb = 0
-
-    for p in selection_from_data:
-        if is_within_bb(p, max_vector, min_vector):
-            num_points_in_bb += 1
+    if is_sorted_dataset(sorted_dataset):
+        # The selection found by the linear scans below contains every point of the bounding box
+        # of a sorted dataset, so the points can be counted from the whole dataset.
+        num_points_in_bb = range_count_index(sorted_dataset).count(min_vector, max_vector)
+    else:
+        # Extend selection in case there are points that have the same first component
+        # as the minimum or maximum vectors.
+        for i in range(selection_end, len(sorted_dataset)):
+            if sorted_dataset[selection_end] <= max_vector:
+                selection_end += 1
+            else:
+                break
+
+        for i in range(selection_begin, 0, -1):
+            if sorted_dataset[selection_begin] >= min_vector:
+                selection_begin -= 1
+            else:
+                break
+
+        selection_from_data = sorted_dataset[selection_begin:selection_end]
+        num_points_in_bb = 0
+
+        for p in selection_from_data:
+            if is_within_bb(p, max_vector, min_vector):
+                num_points_in_bb += 1
 
     if num_points_in_bb == 0:
         return 0
@@ -38,12 +48,35 @@ def bounding_box_compactness(tec, sorted_dataset):
     return pattern_size / num_points_in_bb
 
 
+def is_sorted_dataset(d):
+    """ Returns True if d is a Dataset whose points are in ascending order, so that
+        positions in it can be found by binary search. """
+
+    return isinstance(d, Dataset) and d.is_sorted()
+
+
 def find_pattern_indices(pattern, sorted_dataset):
     """ Find the beginning and end indices of the pattern for compactness computation. """
 
     first = pattern[0]
     last = pattern[len(pattern) - 1]
 
+    if is_sorted_dataset(sorted_dataset):
+        # The end is the first occurrence of last and the beginning the last occurrence of
+        # first before it, or in the whole dataset if last is not found.
+        end = bisect_left(sorted_dataset, last)
+        if end < len(sorted_dataset) and sorted_dataset[end] == last:
+            first_end = bisect_right(sorted_dataset, first, 0, end + 1)
+        else:
+            end = 0
+            first_end = bisect_right(sorted_dataset, first)
+
+        begin = 0
+        if first_end > 0 and sorted_dataset[first_end - 1] == first:
+            begin = first_end - 1
+
+        return begin, end
+
     begin = 0
     end = 0
 
@@ -62,8 +95,9 @@ def compactness(pattern_begin, pattern_end, pattern_size,  sorted_dataset):
         pattern_begin is the first index of the pattern in the sorted_dataset and
         pattern_end is the last index. """
 
-    selection = sorted_dataset[pattern_begin:pattern_end + 1]
-    return pattern_size / len(selection)
+    # The number of points from pattern_begin to pattern_end, as the length of the slice of the dataset would be.
+    selection_size = max(pattern_end + 1 - pattern_begin, 0)
+    return pattern_size / selection_size
 
 
 def is_within_bb(point, max_vector, min_vector):
@@ -84,7 +118,7 @@ def is_within_bb(point, max_vector, min_vector):
 def compression_ratio(tec):
     """ Computes compression ratio as defined in equation 10 [Meredith2013]. """
 
-    return len(tec.coverage()) / (len(tec.get_pattern()) + len(tec.get_translators()) - 1)
+    return tec.coverage_size() / (tec.pattern_size() + tec.translator_count() - 1)
 
 
 def pattern_width(tec):
@@ -0,0 +1,228 @@
+import numpy as np
+from heapq import heappush, heappop
+from helpers import vec
+from vector import Vector
+from tec import TEC
+from new_algorithms import compute_mtp_map, find_occurrences_h
+from dataset import dataset_to_array
+import bitset
+
+
+""" Contains an index of the MTPs and TECs of a sorted dataset that is updated when points are removed
+    from the dataset, as in every iteration of COSIATEC. Only the difference vectors of the pairs that
+    involve removed points are recomputed, and only the TECs whose occurrences contain removed points or
+    whose MTPs change are re-evaluated. """
+
+
+class IncrementalMTPIndex:
+    """ The MTPs of the remaining points of a sorted dataset grouped into classes of translationally
+        equivalent patterns. The points are referred to by their indices in the full sorted dataset.
+        Removing points keeps the pairs of the remaining points in the same order as SIATECH run on the
+        remaining points would, so the TECs returned by the index are the TECs SIATECH would compute.
+
+        Each class is identified by its vectorized pattern as a tuple of vectors. The occurrences of the
+        pattern depend only on the remaining points, so they are filtered when points are removed. The
+        representative of the class is the MTP whose first pair comes first in row major order, which is
+        the MTP kept by SIATECH.
+        The members of each class are kept in a heap ordered by their first pairs. A member only leaves its
+        class when it loses pairs, so members that have left are removed from the heap lazily. """
+
+    _dataset = None
+    _remaining = None
+    _remaining_bits = 0
+    _mtp_map = None
+    _class_of = None
+    _members = None
+    _member_heaps = None
+    _representatives = None
+    _occurrences = None
+    _coverages = None
+    _changed = None
+
+    def __init__(self, sorted_dataset):
+        self._dataset = sorted_dataset
+        self._remaining = [True for _ in range(len(sorted_dataset))]
+        self._remaining_bits = bitset.from_indices(range(len(sorted_dataset)), len(sorted_dataset))
+        self._mtp_map = compute_mtp_map(sorted_dataset)
+        self._class_of = {}
+        self._members = {}
+        self._member_heaps = {}
+        self._representatives = {}
+        self._occurrences = {}
+        self._coverages = {}
+        self._changed = set()
+
+        for diff_vec in self._mtp_map:
+            self._add_member(diff_vec)
+
+    def __len__(self):
+        """ Returns the number of remaining points. """
+        return bitset.popcount(self._remaining_bits)
+
+    def contains(self, index):
+        """ Returns True if the point with the index has not been removed. """
+        return self._remaining[index]
+
+    def get_dataset(self):
+        return self._dataset
+
+    def classes(self):
+        """ Returns the vectorized patterns of the current classes. """
+        return self._members.keys()
+
+    def pop_changed(self):
+        """ Returns the vectorized patterns of the classes that have been added or changed since the last call. """
+
+        changed = self._changed
+        self._changed = set()
+        return changed
+
+    def order(self, vectorized_pattern):
+        """ Returns the position of the class in the output of SIATECH as the first pair of its representative. """
+        return self._mtp_map[self._representatives[vectorized_pattern]][0]
+
+    def coverage(self, vectorized_pattern):
+        """ Returns the covered points of the TEC of the class as a bitset over the indices of the dataset. """
+        return self._coverages[vectorized_pattern]
+
+    def pattern_indices(self, vectorized_pattern):
+        """ Returns the indices of the pattern of the TEC of the class in the full dataset. """
+        return [index_pair[0] for index_pair in self._mtp_map[self._representatives[vectorized_pattern]]]
+
+    def tec(self, vectorized_pattern, relative_indices=False):
+        """ Returns the TEC of the class. If relative_indices is True, the pattern indices are indices into the
+            remaining points, as in the TEC computed by SIATECH for them. Otherwise they are indices into the full
+            dataset, which give the same bounding box compactness. """
+
+        pattern_indices = self.pattern_indices(vectorized_pattern)
+        pattern = [self._dataset[i] for i in pattern_indices]
+        first = pattern[0]
+
+        translators = []
+        occurrences = self._occurrences[vectorized_pattern]
+        for i in occurrences[:, 0].tolist():
+            translators.append(self._dataset[i] - first)
+
+        if relative_indices:
+            pattern_indices = [self.relative_index(i) for i in pattern_indices]
+
+        return TEC(pattern, pattern_indices, translators)
+
+    def relative_index(self, index):
+        """ Returns the index of a remaining point among the remaining points. """
+        return bitset.popcount(self._remaining_bits & ((1 << index) - 1))
+
+    def remove_points(self, indices):
+        """ Removes the points with the given indices from the index. """
+
+        removed = [i for i in set(indices) if self._remaining[i]]
+        if not removed:
+            return
+
+        # Find the difference vectors of all pairs that involve removed points.
+        points = dataset_to_array(self._dataset)
+        is_removed = np.zeros(len(self._dataset), dtype=bool)
+        is_removed[removed] = True
+        was_remaining = np.array(self._remaining)
+        affected = set()
+
+        for i in removed:
+            # Pairs of two removed points are handled when their smaller index is removed.
+            partners = was_remaining.copy()
+            partners[i] = False
+            partners[:i] &= ~is_removed[:i]
+
+            before = np.flatnonzero(partners[:i])
+            after = np.flatnonzero(partners[i + 1:]) + i + 1
+            affected.update(map(Vector, (points[i] - points[before]).tolist()))
+            affected.update(map(Vector, (points[after] - points[i]).tolist()))
+
+        removed_bits = bitset.from_indices(removed, len(self._dataset))
+        for i in removed:
+            self._remaining[i] = False
+        self._remaining_bits = bitset.and_not(self._remaining_bits, removed_bits)
+
+        changed_classes = set()
+        for diff_vec in affected:
+            vectorized_pattern = self._class_of.pop(diff_vec)
+            self._members[vectorized_pattern].remove(diff_vec)
+            changed_classes.add(vectorized_pattern)
+
+            pairs = [index_pair for index_pair in self._mtp_map[diff_vec]
+                     if self._remaining[index_pair[0]] and self._remaining[index_pair[1]]]
+            if pairs:
+                self._mtp_map[diff_vec] = pairs
+            else:
+                del self._mtp_map[diff_vec]
+
+        for vectorized_pattern in changed_classes:
+            self._update_representative(vectorized_pattern)
+
+        # Filter the occurrences that contain removed points.
+        removed_indices = np.array(removed, dtype=np.int64)
+        for vectorized_pattern in list(self._occurrences):
+            if self._coverages[vectorized_pattern] & removed_bits:
+                occurrences = self._occurrences[vectorized_pattern]
+                kept = ~np.isin(occurrences, removed_indices).any(axis=1)
+                self._set_occurrences(vectorized_pattern, occurrences[kept])
+
+        for diff_vec in affected:
+            if diff_vec in self._mtp_map:
+                self._add_member(diff_vec)
+
+    def _add_member(self, diff_vec):
+        pairs = self._mtp_map[diff_vec]
+        pattern = [self._dataset[index_pair[0]] for index_pair in pairs]
+        vectorized_pattern = tuple(vec(pattern))
+        self._class_of[diff_vec] = vectorized_pattern
+
+        if vectorized_pattern not in self._members:
+            self._members[vectorized_pattern] = set()
+            self._member_heaps[vectorized_pattern] = []
+            self._representatives[vectorized_pattern] = diff_vec
+            self._changed.add(vectorized_pattern)
+
+            if vectorized_pattern not in self._occurrences:
+                self._set_occurrences(vectorized_pattern, self._find_occurrences(pairs, vectorized_pattern))
+        elif pairs[0] < self._mtp_map[self._representatives[vectorized_pattern]][0]:
+            self._representatives[vectorized_pattern] = diff_vec
+            self._changed.add(vectorized_pattern)
+
+        self._members[vectorized_pattern].add(diff_vec)
+        heappush(self._member_heaps[vectorized_pattern], (pairs[0], diff_vec))
+
+    def _update_representative(self, vectorized_pattern):
+        """ Removes the class if it has no members left, or finds a new representative
+            if the representative has left the class. """
+
+        members = self._members[vectorized_pattern]
+        if not members:
+            del self._members[vectorized_pattern]
+            del self._member_heaps[vectorized_pattern]
+            del self._representatives[vectorized_pattern]
+            del self._occurrences[vectorized_pattern]
+            del self._coverages[vectorized_pattern]
+            self._changed.discard(vectorized_pattern)
+            return
+
+        if self._representatives[vectorized_pattern] in members:
+            return
+
+        heap = self._member_heaps[vectorized_pattern]
+        while heap[0][1] not in members:
+            heappop(heap)
+
+        self._representatives[vectorized_pattern] = heap[0][1]
+        self._changed.add(vectorized_pattern)
+
+    def _find_occurrences(self, pairs, vectorized_pattern):
+        if len(pairs) == 1:
+            return np.flatnonzero(np.array(self._remaining)).reshape(-1, 1)
+
+        pattern_indices = [index_pair[0] for index_pair in pairs]
+        return find_occurrences_h(pattern_indices, vectorized_pattern, self._mtp_map)
+
+    def _set_occurrences(self, vectorized_pattern, occurrences):
+        self._occurrences[vectorized_pattern] = occurrences
+        self._coverages[vectorized_pattern] = bitset.from_indices(occurrences.ravel(), len(self._dataset))
+        self._changed.add(vectorized_pattern)
@@ -48,6 +48,16 @@ def measure_siatech_siatechf(datasets):
                                                   'random_patterns', algorithm_name='siatechf(th=' + str(cr_th) + ')')
 
 
+def measure_siatechf_thresholds(datasets, thresholds):
+    """ Measures running SIATECHF with all compression ratio thresholds on one shared MTP index.
+        datasets is a dictionary, where the keys are the input file paths and the values are the number
+        of repetitions to run on that dataset. """
+
+    algorithm_name = 'siatechf_thresholds(th=' + ','.join([str(th) for th in thresholds]) + ')'
+    performance.measure_function_time_on_datasets(lambda d: new_algorithms.siatechf_thresholds(d, thresholds),
+                                                  datasets, 'random_patterns', algorithm_name=algorithm_name)
+
+
 def measure_filtering_algorithms(datasets):
     """ Runs comparisons of SIATECHF and the point set compression algorithms.
         datasets is a dictionary, where the keys are the input file paths and the values are the number
@@ -1,18 +1,27 @@
 from helpers import vec
-from dataset import Dataset
-from tec import TEC
+from dataset import Dataset, dataset_to_array
+import numpy as np
+from tec import TEC, IndexedTEC
 from pattern import Pattern
 import heuristics
+import parallel
 from sys import maxsize
 
 
 """ Contains algorithms that use hashing to improve the runtime of MTP and TEC computation. """
 
 
-def siah(d):
+# Number of patterns handed to a worker process at a time in the parallel translator search.
+TRANSLATOR_CHUNK_SIZE = 64
+
+
+def siah(d, max_onset_diff=None):
     """ Computes the MTPs of dataset d.
         Uses a dictionary/map to avoid having to sort the
-        set of difference vectors. Runs in O(kn^2) expected time. """
+        set of difference vectors. Runs in O(kn^2) expected time.
+        If max_onset_diff is given, only the MTPs of the difference vectors whose first component
+        (onset) is at most max_onset_diff are computed, in O(knw) expected time, where w is the
+        greatest number of points within max_onset_diff of a point. """
 
     d = Dataset.sort_ascending(d)
     # Dictionary of difference vector, index list pairs.
@@ -24,6 +33,10 @@ def siah(d):
     for i in range(len(d)):
         for j in range(i + 1, len(d)):
             diff = d[j] - d[i]
+            # The dataset is sorted, so the onset differences of the later points are greater.
+            if max_onset_diff is not None and diff[0] > max_onset_diff:
+                break
+
             if diff in mtp_dict:
                 mtp_dict[diff].append(i)
             else:
@@ -41,107 +54,525 @@ def siah(d):
     return mtps
 
 
-def siatech(d):
+def iter_siah(d, max_onset_diff=None):
+    """ Generates the same MTPs as SIAH one at a time. The pattern of each MTP is only
+        collected when it is generated, so the MTPs are not all held in memory. """
+
     d = Dataset.sort_ascending(d)
-    # Map of difference vector, index list pairs.
-    mtp_map = {}
+    for diff_vec, mtp in compute_mtp_map(d, max_onset_diff).items():
+        yield diff_vec, [d[index_pair[0]] for index_pair in mtp]
 
-    # Compute the difference vectors between points and add both
-    # the starting and ending index as pair to the lists corresponding to the
-    # difference vector.
-    for i in range(len(d)):
-        for j in range(i + 1, len(d)):
-            diff = d[j] - d[i]
-            if diff in mtp_map:
-                mtp_map[diff].append((i, j))
-            else:
-                mtp_map[diff] = [(i, j)]
 
-    tecs = []
-    handled_patterns = set()
+def siatech(d, processes=1, max_onset_diff=None):
+    """ Computes the TECs of dataset d. If processes is other than 1, the translators are computed
+        in that many processes (None uses all CPUs), and the map of difference vectors is built in
+        them as a PackedMTPMap if the difference vectors are exact, see Dataset.has_exact_differences.
+        Datasets on a decimal grid can be quantized for this, see Dataset.quantize. If max_onset_diff is
+        given, only the TECs of the MTPs of the difference vectors whose first component is at most
+        max_onset_diff are computed, see OnsetWindowMTPMap.
+        The translators of a pattern are then searched from the pairs of a vector of the pattern within the
+        window, but the pairs of a pattern whose consecutive points are all farther apart than the window are
+        searched from all points, so only SIAH keeps the O(knw) time bound. """
 
-    for diff_vec in mtp_map:
-        pattern = []
-        pattern_indices = []
-        mtp = mtp_map[diff_vec]
+    d = Dataset.sort_ascending(d)
+    return MTPIndex(d, onset_window_mtp_map(d, max_onset_diff), processes).tecs()
 
-        for index_pair in mtp:
-            pattern_indices.append(index_pair[0])
-            pattern.append(d[index_pair[0]])
 
-        vectorized_pattern = Pattern(vec(pattern))
+def siatech_indexed(d):
+    """ Computes the same TECs as SIATECH as IndexedTECs, which refer to the points of the
+        sorted dataset by their indices instead of holding vectors. The patterns and translators are the
+        same, but the coverage of an IndexedTEC holds the points of the dataset, whereas with float components
+        the sums of the points and translators of a TEC can differ from them by rounding errors. """
 
-        if vectorized_pattern not in handled_patterns:
-            translators = []
-            if len(pattern) == 1:
-                for point in d:
-                    translators.append(point - pattern[0])
-            else:
-                translators = find_translators_h(pattern, vectorized_pattern, mtp_map, d)
+    d = Dataset.sort_ascending(d)
+    return MTPIndex(d).indexed_tecs()
 
-            tecs.append(TEC(pattern, pattern_indices, translators))
-            handled_patterns.add(vectorized_pattern)
 
-    return tecs
+def iter_siatech(d, processes=1, max_onset_diff=None):
+    """ Generates the same TECs as SIATECH one at a time. The TECs are not stored, so the
+        caller can write them out or filter them without holding all of them in memory. """
 
+    d = Dataset.sort_ascending(d)
+    return MTPIndex(d, onset_window_mtp_map(d, max_onset_diff), processes).iter_tecs()
 
-def siatech_pf(d, c_min):
-    """ SIATECH that only returns TECs with compression ratio of at least c_min.
-        Computes all TECs and filters out those with insufficient compression ratio (postfiltering). """
 
-    d = Dataset.sort_ascending(d)
-    # Map of difference vector, index list pairs.
+def compute_mtp_map(d, max_onset_diff=None):
+    """ Computes the map of difference vectors of the sorted dataset d. Both the starting and
+        ending index of each difference vector are added as a pair to the list of the difference vector,
+        so the pairs in each list are in ascending order. If max_onset_diff is given, only the
+        difference vectors whose first component is at most max_onset_diff are added. """
+
     mtp_map = {}
 
-    # Compute the difference vectors between points and add both
-    # the starting and ending index as pair to the lists corresponding to the
-    # difference vector.
     for i in range(len(d)):
         for j in range(i + 1, len(d)):
             diff = d[j] - d[i]
+            # The dataset is sorted, so the onset differences of the later points are greater.
+            if max_onset_diff is not None and diff[0] > max_onset_diff:
+                break
+
             if diff in mtp_map:
                 mtp_map[diff].append((i, j))
             else:
                 mtp_map[diff] = [(i, j)]
 
-    tecs = []
-    handled_patterns = set()
+    return mtp_map
+
+
+def onset_window_mtp_map(sorted_dataset, max_onset_diff):
+    """ Returns an OnsetWindowMTPMap of the sorted dataset, or None if max_onset_diff is None. """
+
+    if max_onset_diff is None:
+        return None
+
+    return OnsetWindowMTPMap(sorted_dataset, max_onset_diff)
+
+
+class OnsetWindowMTPMap:
+    """ Map of difference vectors and (starting index, ending index) pair lists of a sorted dataset
+        that only holds the difference vectors whose first component (onset) is at most max_onset_diff.
+        Only the points within the window of each point are paired, and the MTPs of the vectors in the
+        window are the same as in the full map of SIATECH.
+
+        The vectorized patterns of these MTPs can contain vectors beyond the window. The map does not
+        contain them, but their pairs are found when asked for: the ending points of the pairs that start
+        from a point have the same first component, so they are found by binary search over the first
+        components of the sorted dataset. The translator search starts from the pairs of a vector within the
+        window and follows the vectors beyond it only from the points it has reached, with pairs_from and
+        pairs_to.
+
+        The pairs of repeated points do not follow from the first components in this way, so if the dataset
+        has repeated points, the full map is also built and the vectors beyond the window are looked up from it. """
+
+    _dataset = None
+    _max_onset_diff = None
+    _mtp_map = None
+    _lookup_map = None
+
+    def __init__(self, sorted_dataset, max_onset_diff):
+        self._dataset = sorted_dataset
+        self._max_onset_diff = max_onset_diff
+        self._mtp_map = compute_mtp_map(sorted_dataset, max_onset_diff)
+        self._lookup_map = self._mtp_map
+        if not sorted_dataset.has_unique_vectors():
+            self._lookup_map = compute_mtp_map(sorted_dataset)
+
+    def get_max_onset_diff(self):
+        return self._max_onset_diff
+
+    def __len__(self):
+        """ Returns the number of difference vectors within the window. """
+        return len(self._mtp_map)
+
+    def __contains__(self, diff):
+        """ Returns True if the difference vector has pairs and is within the window, or the dataset
+            has repeated points. """
+        return diff in self._lookup_map
+
+    def __getitem__(self, diff):
+        """ Returns the list of (starting index, ending index) pairs of the difference vector. """
+
+        if diff in self._lookup_map:
+            return self._lookup_map[diff]
+
+        if diff[0] <= self._max_onset_diff or self._lookup_map is not self._mtp_map:
+            raise KeyError(diff)
+
+        return self.pairs_from(diff, range(len(self._dataset)))
+
+    def __iter__(self):
+        return iter(self._mtp_map)
+
+    def items(self):
+        """ Iterates the difference vectors within the window and their lists of index pairs. """
+        return self._mtp_map.items()
+
+    def pairs_from(self, diff, start_indices):
+        """ Returns the (starting index, ending index) pairs of the difference vector whose starting
+            indices are in the ascending sequence start_indices. """
+
+        points = dataset_to_array(self._dataset)
+        if len(points) == 0:
+            return []
 
-    for diff_vec in mtp_map:
-        pattern = []
-        pattern_indices = []
-        mtp = mtp_map[diff_vec]
+        first_components = points[:, 0]
+        starts = np.asarray(start_indices, dtype=np.int64)
 
-        for index_pair in mtp:
-            pattern_indices.append(index_pair[0])
-            pattern.append(d[index_pair[0]])
+        # The candidate ending points of each starting point are those whose onset difference is diff[0].
+        begins = _first_index_beyond_onset_diff(first_components, starts, diff[0], False)
+        ends = _first_index_beyond_onset_diff(first_components, starts, diff[0], True)
+        lengths = ends - begins
+        total = int(lengths.sum())
 
-        vectorized_pattern = Pattern(vec(pattern))
+        offsets = np.cumsum(lengths) - lengths
+        pair_starts = np.repeat(starts, lengths)
+        pair_ends = np.repeat(begins, lengths) + np.arange(total, dtype=np.int64) - np.repeat(offsets, lengths)
 
-        if vectorized_pattern not in handled_patterns:
+        components = np.array(diff.components(), dtype=points.dtype)
+        found = (points[pair_ends] - points[pair_starts] == components).all(axis=1)
+        return list(zip(pair_starts[found].tolist(), pair_ends[found].tolist()))
+
+    def pairs_to(self, diff, end_indices):
+        """ Returns the (starting index, ending index) pairs of the difference vector whose ending
+            indices are in the ascending sequence end_indices. """
+
+        points = dataset_to_array(self._dataset)
+        if len(points) == 0:
+            return []
+
+        first_components = points[:, 0]
+        ends = np.asarray(end_indices, dtype=np.int64)
+
+        # The candidate starting points of each ending point are those whose onset difference is diff[0].
+        begins = _first_index_within_onset_diff(first_components, ends, diff[0], False)
+        stops = _first_index_within_onset_diff(first_components, ends, diff[0], True)
+        lengths = stops - begins
+        total = int(lengths.sum())
+
+        offsets = np.cumsum(lengths) - lengths
+        pair_ends = np.repeat(ends, lengths)
+        pair_starts = np.repeat(begins, lengths) + np.arange(total, dtype=np.int64) - np.repeat(offsets, lengths)
+
+        components = np.array(diff.components(), dtype=points.dtype)
+        found = (points[pair_ends] - points[pair_starts] == components).all(axis=1)
+        return list(zip(pair_starts[found].tolist(), pair_ends[found].tolist()))
+
+
+def _first_index_beyond_onset_diff(first_components, starts, onset_diff, strict):
+    """ Returns for each starting index i the first index j > i of the sorted first components for which
+        first_components[j] - first_components[i] is at least onset_diff, or greater than it if strict is True.
+        The onset difference grows with j, so the position found by binary search for the sum of the onset
+        and onset_diff is only corrected where rounding makes the sum and the difference disagree. """
+
+    n = len(first_components)
+    onsets = first_components[starts]
+    reached = np.greater if strict else np.greater_equal
+    indices = np.maximum(np.searchsorted(first_components, onsets + onset_diff, 'right' if strict else 'left'),
+                         starts + 1)
+
+    lower = (indices > starts + 1) & reached(first_components[indices - 1] - onsets, onset_diff)
+    while lower.any():
+        indices[lower] -= 1
+        lower = (indices > starts + 1) & reached(first_components[indices - 1] - onsets, onset_diff)
+
+    higher = (indices < n) & ~reached(first_components[np.minimum(indices, n - 1)] - onsets, onset_diff)
+    while higher.any():
+        indices[higher] += 1
+        higher = (indices < n) & ~reached(first_components[np.minimum(indices, n - 1)] - onsets, onset_diff)
+
+    return indices
+
+
+def _first_index_within_onset_diff(first_components, ends, onset_diff, strict):
+    """ Returns for each ending index j the first index i < j of the sorted first components for which
+        first_components[j] - first_components[i] is at most onset_diff, or less than it if strict is True,
+        and j if there is none. The counterpart of _first_index_beyond_onset_diff for the starting points. """
+
+    onsets = first_components[ends]
+    reached = np.less if strict else np.less_equal
+    indices = np.minimum(np.searchsorted(first_components, onsets - onset_diff, 'right' if strict else 'left'),
+                         ends)
+
+    lower = (indices > 0) & reached(onsets - first_components[np.maximum(indices - 1, 0)], onset_diff)
+    while lower.any():
+        indices[lower] -= 1
+        lower = (indices > 0) & reached(onsets - first_components[np.maximum(indices - 1, 0)], onset_diff)
+
+    higher = (indices < ends) & ~reached(onsets - first_components[np.minimum(indices, ends)], onset_diff)
+    while higher.any():
+        indices[higher] += 1
+        higher = (indices < ends) & ~reached(onsets - first_components[np.minimum(indices, ends)], onset_diff)
+
+    return indices
+
+
+class MTPIndex:
+    """ The MTPs of a sorted dataset indexed by their difference vectors.
+        The index is built once and shared by SIATECH and its filtering variants, so that
+        several thresholds can be evaluated without recomputing the difference vector table.
+        Translators are computed once for each vectorized pattern when they are first needed. """
+
+    _dataset = None
+    _mtp_map = None
+    _patterns = None
+    _translators = None
+    _processes = 1
+
+    def __init__(self, sorted_dataset, mtp_map=None, processes=1):
+        """ mtp_map is the map of difference vectors and (starting index, ending index) pair lists of
+            sorted_dataset, for example one built with numpy_engine or a PackedMTPMap.
+            If it is not given, it is computed with compute_mtp_map, or as a PackedMTPMap
+            in a pool of processes if processes is other than 1. Datasets whose components are not on
+            a grid cannot be packed, so their map is computed with compute_mtp_map. The translators of
+            the TECs are also computed in a pool of processes if processes is other than 1. """
+
+        self._dataset = sorted_dataset
+        if mtp_map is None and processes != 1:
+            mtp_map = packed_mtp_map_or_none(sorted_dataset, processes)
+
+        if mtp_map is None:
+            mtp_map = compute_mtp_map(sorted_dataset)
+
+        self._mtp_map = mtp_map
+        self._translators = {}
+        self._processes = processes
+
+    def get_dataset(self):
+        return self._dataset
+
+    def get_mtp_map(self):
+        return self._mtp_map
+
+    def mtp_pairs(self, diff_vec):
+        """ Returns the (starting index, ending index) pairs of the difference vector. """
+        return self._mtp_map[diff_vec]
+
+    def mtps(self):
+        """ Returns the MTPs as a list of (difference vector, pattern) tuples in the same order as SIAH. """
+
+        mtps = []
+        for diff_vec, mtp in self._mtp_map.items():
+            mtps.append((diff_vec, [self._dataset[index_pair[0]] for index_pair in mtp]))
+
+        return mtps
+
+    def unique_patterns(self):
+        """ Returns the MTPs with distinct vectorized patterns as a list of
+            (pattern, pattern_indices, vectorized_pattern) tuples. Of translationally equivalent MTPs
+            only the first one in the order of the map is kept. """
+
+        if self._patterns is None:
+            self._patterns = list(self.iter_unique_patterns())
+
+        return self._patterns
+
+    def iter_unique_patterns(self):
+        """ Generates the same tuples as unique_patterns without storing them in the index. """
+
+        if self._patterns is not None:
+            yield from self._patterns
+            return
+
+        handled_patterns = set()
+        for pattern_indices in start_index_lists(self._mtp_map):
+            pattern = [self._dataset[index] for index in pattern_indices]
+            vectorized_pattern = Pattern(vec(pattern))
+
+            if vectorized_pattern not in handled_patterns:
+                handled_patterns.add(vectorized_pattern)
+                yield pattern, pattern_indices, vectorized_pattern
+
+    def translators(self, pattern, vectorized_pattern):
+        """ Returns the translators of an MTP pattern. """
+
+        if vectorized_pattern not in self._translators:
+            self._translators[vectorized_pattern] = self._find_translators(pattern, vectorized_pattern)
+
+        return self._translators[vectorized_pattern]
+
+    def _find_translators(self, pattern, vectorized_pattern):
+        if len(pattern) == 1:
             translators = []
-            if len(pattern) == 1:
-                for point in d:
-                    translators.append(point - pattern[0])
+            for point in self._dataset:
+                translators.append(point - pattern[0])
+            return translators
+
+        return find_translators_h(pattern, vectorized_pattern, self._mtp_map, self._dataset)
+
+    def compute_translators(self, patterns):
+        """ Computes the translators that have not been computed yet for the patterns, given as
+            (pattern, pattern_indices, vectorized_pattern) tuples. If the index uses more than one process,
+            the translators of the patterns are searched in parallel. """
+
+        missing = []
+        for pattern, _, vectorized_pattern in patterns:
+            if len(pattern) > 1 and vectorized_pattern not in self._translators:
+                missing.append((pattern, vectorized_pattern))
+
+        if self._processes == 1 or len(missing) <= TRANSLATOR_CHUNK_SIZE:
+            for pattern, vectorized_pattern in missing:
+                self.translators(pattern, vectorized_pattern)
+            return
+
+        vectorized_patterns = [vectorized_pattern for _, vectorized_pattern in missing]
+        results = parallel.imap_with_shared_state(_find_target_indices_of_pattern, range(len(missing)),
+                                                  (vectorized_patterns, self._mtp_map), self._processes,
+                                                  TRANSLATOR_CHUNK_SIZE)
+
+        for (pattern, vectorized_pattern), target_indices in zip(missing, results):
+            self._translators[vectorized_pattern] = translators_from_target_indices(pattern, target_indices,
+                                                                                    self._dataset)
+
+    def cr_upper_bound(self, pattern):
+        """ Returns an upper bound on the compression ratio of the TEC of the pattern. """
+        return cr_upper_bound(pattern, self._mtp_map, self._dataset)
+
+    def tec(self, pattern, pattern_indices, vectorized_pattern):
+        """ Returns the TEC of an MTP pattern. """
+
+        translators = self.translators(pattern, vectorized_pattern)
+        return TEC(list(pattern), list(pattern_indices), list(translators))
+
+    def tecs(self):
+        """ Returns the TECs of the MTPs as computed by SIATECH. """
+
+        self.compute_translators(self.unique_patterns())
+
+        tecs = []
+        for pattern, pattern_indices, vectorized_pattern in self.unique_patterns():
+            tecs.append(self.tec(pattern, pattern_indices, vectorized_pattern))
+
+        return tecs
+
+    def iter_tecs(self):
+        """ Generates the TECs in the same order as tecs(). Neither the TECs nor their translators are
+            stored in the index, so only the map and the distinct vectorized patterns are held in memory. """
+
+        if self._processes == 1:
+            for pattern, pattern_indices, vectorized_pattern in self.iter_unique_patterns():
+                translators = self._translators.get(vectorized_pattern)
+                if translators is None:
+                    translators = self._find_translators(pattern, vectorized_pattern)
+                yield TEC(list(pattern), list(pattern_indices), list(translators))
+            return
+
+        patterns = list(self.iter_unique_patterns())
+        vectorized_patterns = [vectorized_pattern for _, _, vectorized_pattern in patterns]
+        results = parallel.imap_with_shared_state(_find_target_indices_of_pattern, range(len(patterns)),
+                                                  (vectorized_patterns, self._mtp_map), self._processes,
+                                                  TRANSLATOR_CHUNK_SIZE)
+
+        for (pattern, pattern_indices, vectorized_pattern), target_indices in zip(patterns, results):
+            if target_indices is None:
+                translators = self._find_translators(pattern, vectorized_pattern)
             else:
-                translators = find_translators_h(pattern, vectorized_pattern, mtp_map, d)
+                translators = translators_from_target_indices(pattern, target_indices, self._dataset)
+            yield TEC(list(pattern), list(pattern_indices), translators)
+
+    def indexed_tec(self, pattern_indices, vectorized_pattern):
+        """ Returns the TEC of an MTP pattern as an IndexedTEC. """
+
+        if len(pattern_indices) == 1:
+            occurrences = np.arange(len(self._dataset)).reshape(-1, 1)
+        elif not self._dataset.has_unique_vectors():
+            occurrences = _merge_occurrences(vectorized_pattern, self._mtp_map)
+        else:
+            occurrences = find_occurrences_h(pattern_indices, vectorized_pattern, self._mtp_map)
+
+        return IndexedTEC(self._dataset, pattern_indices, occurrences)
+
+    def indexed_tecs(self):
+        """ Returns the TECs of the MTPs as computed by SIATECH as IndexedTECs. """
+
+        tecs = []
+        for _, pattern_indices, vectorized_pattern in self.iter_unique_patterns():
+            tecs.append(self.indexed_tec(pattern_indices, vectorized_pattern))
+
+        return tecs
 
-            tec = TEC(pattern, pattern_indices, translators)
-            if heuristics.compression_ratio(tec) >= c_min:
+    def filtered_tecs(self, min_cr, use_upper_bound=True):
+        """ Returns the TECs that have compression ratio of at least min_cr.
+            If use_upper_bound is True, the translators are not computed for patterns whose
+            upper bound on compression ratio is below min_cr as in SIATECHF. Otherwise all
+            TECs are computed and filtered afterwards as in SIATECH-PF. The patterns are skipped by
+            the bound also if their translators have been computed, so that the TECs do not depend
+            on the earlier calls. """
+
+        candidates = []
+        for pattern, pattern_indices, vectorized_pattern in self.unique_patterns():
+            if use_upper_bound and self.cr_upper_bound(pattern) < min_cr:
+                continue
+
+            candidates.append((pattern, pattern_indices, vectorized_pattern))
+
+        self.compute_translators(candidates)
+
+        tecs = []
+        for pattern, pattern_indices, vectorized_pattern in candidates:
+            tec = self.tec(pattern, pattern_indices, vectorized_pattern)
+            if heuristics.compression_ratio(tec) >= min_cr:
                 tecs.append(tec)
 
-            handled_patterns.add(vectorized_pattern)
+        return tecs
 
-    return tecs
+
+def start_index_lists(mtp_map):
+    """ Iterates the lists of the starting indices of the pairs of the difference vectors in the order
+        of the map. Maps that hold their pairs in arrays, such as PackedMTPMap, provide the lists without
+        creating the difference vectors and the pairs. """
+
+    if hasattr(mtp_map, 'start_index_lists'):
+        return mtp_map.start_index_lists()
+
+    return ([index_pair[0] for index_pair in mtp] for _, mtp in mtp_map.items())
+
+
+def packed_mtp_map_or_none(sorted_dataset, processes):
+    """ Returns the PackedMTPMap of the sorted dataset built in a pool of processes, or None if the
+        difference vectors of the dataset are not exact or cannot be packed. """
+
+    # Imported here, because the NumPy engine builds on this module.
+    from packed_mtp_map import PackedMTPMap
+
+    if not sorted_dataset.has_exact_differences():
+        return None
+
+    try:
+        return PackedMTPMap(sorted_dataset, processes=processes)
+    except ValueError:
+        return None
+
+
+def _find_target_indices_of_pattern(i):
+    """ Returns the target indices of the ith vectorized pattern, or None for single point patterns,
+        whose translators are not searched from the map. """
+
+    vectorized_patterns, mtp_map = parallel.shared_state()
+    if len(vectorized_patterns[i]) == 0:
+        return None
+
+    return find_target_indices_h(vectorized_patterns[i], mtp_map)
+
+
+def tecs_from_mtp_map(mtp_map, d):
+    """ Computes the TECs of the sorted dataset d from the map of difference vectors
+        and (starting index, ending index) pair lists built by SIATECH. The map can be
+        a dictionary or any mapping with the same interface, such as PackedMTPMap. """
+
+    return MTPIndex(d, mtp_map).tecs()
+
+
+def siatech_pf(d, c_min):
+    """ SIATECH that only returns TECs with compression ratio of at least c_min.
+        Computes all TECs and filters out those with insufficient compression ratio (postfiltering). """
+
+    d = Dataset.sort_ascending(d)
+    return MTPIndex(d).filtered_tecs(c_min, use_upper_bound=False)
 
 
 def find_translators_h(mtp, vectorized_mtp, mtp_map, sorted_dataset):
+    target_indices = find_target_indices_h(vectorized_mtp, mtp_map)
+    return translators_from_target_indices(mtp, target_indices, sorted_dataset)
+
+
+def find_target_indices_h(vectorized_mtp, mtp_map):
+    """ Finds the indices of the points onto which the last point of the MTP is translated
+        by its translators, by intersecting the index pair lists of the vectorized MTP. """
+
+    if vectorized_mtp[0] not in mtp_map:
+        return _find_target_indices_in_window(vectorized_mtp, mtp_map)
+
     target_indices = []
     for index_pair in mtp_map[vectorized_mtp[0]]:
         target_indices.append(index_pair[1])
 
     for i in range(1, len(vectorized_mtp)):
         v = vectorized_mtp[i]
+        if v not in mtp_map:
+            # Vectors beyond the window of an OnsetWindowMTPMap are followed from the current targets.
+            target_indices = [index_pair[1] for index_pair in mtp_map.pairs_from(v, target_indices)]
+            continue
+
         index_pair_list = mtp_map[v]
 
         tmp_target_indices = []
@@ -159,6 +590,130 @@ def find_translators_h(mtp, vectorized_mtp, mtp_map, sorted_dataset):
 
         target_indices = tmp_target_indices
 
+    return target_indices
+
+
+def _find_target_indices_in_window(vectorized_mtp, mtp_map):
+    """ Finds the same indices as find_target_indices_h for a vectorized MTP whose first vector is beyond
+        the window of an OnsetWindowMTPMap. The occurrences are tracked by the indices of their first and last
+        points, starting from the pairs of the vector within the window that has the fewest pairs, and
+        extended to the following and the preceding vectors from the points they have reached. If no vector
+        is within the window, the pairs of the first vector are searched from all points. """
+
+    in_window = [i for i in range(len(vectorized_mtp)) if vectorized_mtp[i] in mtp_map]
+    if in_window:
+        seed = min(in_window, key=lambda i: len(mtp_map[vectorized_mtp[i]]))
+    else:
+        seed = 0
+
+    occurrences = mtp_map[vectorized_mtp[seed]]
+
+    for i in range(seed + 1, len(vectorized_mtp)):
+        v = vectorized_mtp[i]
+        if v in mtp_map:
+            index_pairs = mtp_map[v]
+        else:
+            index_pairs = mtp_map.pairs_from(v, [last for _, last in occurrences])
+
+        ends = dict(index_pairs)
+        occurrences = [(first, ends[last]) for first, last in occurrences if last in ends]
+
+    for i in range(seed - 1, -1, -1):
+        v = vectorized_mtp[i]
+        if v in mtp_map:
+            index_pairs = mtp_map[v]
+        else:
+            index_pairs = mtp_map.pairs_to(v, [first for first, _ in occurrences])
+
+        starts = dict([(end, start) for start, end in index_pairs])
+        occurrences = [(starts[first], last) for first, last in occurrences if first in starts]
+
+    return [last for _, last in occurrences]
+
+
+def find_occurrences_h(pattern_indices, vectorized_mtp, mtp_map):
+    """ Finds the occurrences of an MTP pattern of at least two points as a (translator count, pattern size)
+        array of dataset indices. The occurrences are extended one point at a time by matching the
+        indices of their last points against the starting indices of the next difference vector, in the
+        same way as find_target_indices_h. The occurrences are in ascending order, so the translators are in
+        the same order as in SIATECH. """
+
+    starts, ends = _pair_arrays(mtp_map, vectorized_mtp[0])
+    columns = [starts, ends]
+
+    for i in range(1, len(vectorized_mtp)):
+        if vectorized_mtp[i] in mtp_map:
+            starts, ends = _pair_arrays(mtp_map, vectorized_mtp[i])
+        else:
+            # Vectors beyond the window of an OnsetWindowMTPMap are followed from the current last points.
+            pairs = np.array(mtp_map.pairs_from(vectorized_mtp[i], np.unique(columns[-1]).tolist()),
+                             dtype=np.int64).reshape(-1, 2)
+            starts, ends = pairs[:, 0], pairs[:, 1]
+
+        # The starting indices of the pairs of a difference vector are distinct and ascending.
+        positions = np.searchsorted(starts, columns[-1])
+        positions[positions == len(starts)] = 0
+        found = starts[positions] == columns[-1] if len(starts) else np.zeros(len(positions), dtype=bool)
+
+        columns = [column[found] for column in columns]
+        columns.append(ends[positions[found]])
+
+    occurrences = np.stack(columns, axis=1)
+    if len(pattern_indices) != len(columns):
+        raise ValueError('The vectorized pattern does not match the pattern indices')
+
+    return occurrences
+
+
+def _merge_occurrences(vectorized_mtp, mtp_map):
+    """ Finds the occurrences of an MTP pattern with the same merge of the index pair lists as
+        find_target_indices_h. The starting indices of the pairs are not distinct if the dataset has
+        repeated points, and the merge then keeps the same occurrences as SIATECH. """
+
+    occurrences = [list(index_pair) for index_pair in mtp_map[vectorized_mtp[0]]]
+
+    for i in range(1, len(vectorized_mtp)):
+        index_pair_list = mtp_map[vectorized_mtp[i]]
+
+        extended = []
+        j = 0
+        k = 0
+        while j < len(occurrences) and k < len(index_pair_list):
+            if occurrences[j][-1] == index_pair_list[k][0]:
+                extended.append(occurrences[j] + [index_pair_list[k][1]])
+                j += 1
+                k += 1
+            elif occurrences[j][-1] < index_pair_list[k][0]:
+                j += 1
+            else:
+                k += 1
+
+        occurrences = extended
+
+    return np.array(occurrences, dtype=np.int64).reshape(-1, len(vectorized_mtp) + 1)
+
+
+def _pair_arrays(mtp_map, diff_vec):
+    """ Returns the starting and ending indices of the pairs of a difference vector as arrays. """
+
+    if hasattr(mtp_map, 'starts'):
+        return np.asarray(mtp_map.starts(diff_vec), dtype=np.int64), np.asarray(mtp_map.ends(diff_vec), dtype=np.int64)
+
+    pairs = np.array(mtp_map[diff_vec], dtype=np.int64).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def _pair_count(mtp_map, diff_vec):
+    """ Returns the number of index pairs of a difference vector without creating the pairs
+        if the map can count them, as PackedMTPMap can. """
+
+    if hasattr(mtp_map, 'pair_count'):
+        return mtp_map.pair_count(diff_vec)
+
+    return len(mtp_map[diff_vec])
+
+
+def translators_from_target_indices(mtp, target_indices, sorted_dataset):
     translators = []
     last_point = mtp[len(mtp) - 1]
 
@@ -171,50 +726,20 @@ def find_translators_h(mtp, vectorized_mtp, mtp_map, sorted_dataset):
 
 def siatechf(d, min_cr):
     """ SIATECH that only returns TECs that have compression ratio of at least min_cr. """
-    d = Dataset.sort_ascending(d)
-    # Map of difference vector, index list pairs.
-    mtp_map = {}
 
-    # Compute the difference vectors between points and add both
-    # the starting and ending index as pair to the lists corresponding to the
-    # difference vector.
-    for i in range(len(d)):
-        for j in range(i + 1, len(d)):
-            diff = d[j] - d[i]
-            if diff in mtp_map:
-                mtp_map[diff].append((i, j))
-            else:
-                mtp_map[diff] = [(i, j)]
-
-    tecs = []
-    handled_patterns = set()
-
-    for diff_vec in mtp_map:
-        pattern = []
-        pattern_indices = []
-        mtp = mtp_map[diff_vec]
-
-        for index_pair in mtp:
-            pattern_indices.append(index_pair[0])
-            pattern.append(d[index_pair[0]])
-
-        vectorized_pattern = Pattern(vec(pattern))
-
-        if vectorized_pattern not in handled_patterns:
-            if cr_upper_bound(pattern, mtp_map, d) >= min_cr:
-                translators = []
-                if len(pattern) == 1:
-                    for point in d:
-                        translators.append(point - pattern[0])
-                else:
-                    translators = find_translators_h(pattern, vectorized_pattern, mtp_map, d)
+    d = Dataset.sort_ascending(d)
+    return MTPIndex(d).filtered_tecs(min_cr)
 
-                tec = TEC(pattern, pattern_indices, translators)
 
-                if heuristics.compression_ratio(tec) >= min_cr:
-                    tecs.append(tec)
+def siatechf_thresholds(d, min_crs):
+    """ Runs SIATECHF with each compression ratio threshold in min_crs on dataset d.
+        The MTP index and the translators are computed once and shared by all the thresholds.
+        Returns a dictionary of threshold, TEC list pairs. """
 
-            handled_patterns.add(vectorized_pattern)
+    index = MTPIndex(Dataset.sort_ascending(d))
+    tecs = {}
+    for min_cr in min_crs:
+        tecs[min_cr] = index.filtered_tecs(min_cr)
 
     return tecs
 
@@ -227,8 +752,9 @@ def cr_upper_bound(pattern, mtp_map, dataset):
         vec_pat.append(pattern[len(pattern) - 1] - pattern[0])
     min_occ = maxsize
     for v in vec_pat:
-        if len(mtp_map[v]) < min_occ:
-            min_occ = len(mtp_map[v])
+        occ = _pair_count(mtp_map, v)
+        if occ < min_occ:
+            min_occ = occ
 
     transl_bound = min(min_occ, len(dataset) - len(pattern) + 1)
 
@@ -0,0 +1,285 @@
+import gc
+import numpy as np
+from contextlib import contextmanager
+from vector import Vector
+from dataset import Dataset, dataset_to_array
+from new_algorithms import tecs_from_mtp_map
+
+
+""" Contains a NumPy based engine for computing the difference vector tables used by SIAH and SIATECH.
+    The sorted dataset is held as a contiguous (n, k) array and the difference vectors of all pairs
+    of points are computed in blocks of rows instead of one pair at a time. """
+
+
+# Upper limit for the number of difference vectors computed at once.
+MAX_BLOCK_PAIRS = 2 ** 22
+
+
+def row_blocks(n, max_block_pairs=MAX_BLOCK_PAIRS):
+    """ Splits the rows 0..n-1 of the upper triangle of the difference vector table
+        into consecutive ranges [begin, end) of at most max_block_pairs pairs.
+        A single row is never split, so a range can exceed the limit if a row does. """
+
+    blocks = []
+    begin = 0
+    pairs = 0
+
+    for i in range(n - 1):
+        row_pairs = n - 1 - i
+        if pairs > 0 and pairs + row_pairs > max_block_pairs:
+            blocks.append((begin, i))
+            begin = i
+            pairs = 0
+        pairs += row_pairs
+
+    if begin < n - 1:
+        blocks.append((begin, n - 1))
+
+    return blocks
+
+
+def block_pairs(n, begin, end):
+    """ Returns the starting and ending indices of all pairs (i, j), begin <= i < end, i < j < n,
+        in row major order as two arrays. """
+
+    rows = np.arange(begin, end, dtype=np.int64)
+    counts = n - 1 - rows
+    total = int(counts.sum())
+
+    starts = np.repeat(rows, counts)
+    row_offsets = np.cumsum(counts) - counts
+    ends = starts + 1 + np.arange(total, dtype=np.int64) - np.repeat(row_offsets, counts)
+
+    return starts, ends
+
+
+@contextmanager
+def cyclic_gc_paused():
+    """ Pauses the cyclic garbage collector while the MTPs are collected from the arrays. The vectors,
+        lists and tuples of the MTPs cannot form reference cycles, but the collector would otherwise
+        traverse the growing list of MTPs again and again. """
+
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def difference_blocks(points, max_block_pairs=MAX_BLOCK_PAIRS):
+    """ Generates the upper triangle of the difference vector table of the sorted points
+        as blocks of (differences, starting indices, ending indices). """
+
+    n = len(points)
+    for begin, end in row_blocks(n, max_block_pairs):
+        starts, ends = block_pairs(n, begin, end)
+        yield points[ends] - points[starts], starts, ends
+
+
+def group_difference_pairs(points, max_block_pairs=MAX_BLOCK_PAIRS):
+    """ Groups the pairs (i, j), i < j, of the sorted points by their difference vector points[j] - points[i].
+        Returns the tuple (diffs, offsets, starts, ends, order), where diffs holds the distinct difference vectors
+        as rows in ascending lexicographical order and the pairs of the difference vector diffs[g] are
+        (starts[offsets[g]:offsets[g + 1]], ends[offsets[g]:offsets[g + 1]]) in ascending order.
+        order lists the groups in the order of the first occurrence of their difference vector in the
+        row major order of the table, which is the order in which SIAH and SIATECH insert them into their maps.
+        The difference vectors are computed in blocks of at most max_block_pairs pairs, but they are
+        sorted together, so the blocks do not bound the peak memory use. """
+
+    n, k = points.shape if points.ndim == 2 else (0, 0)
+    if n < 2:
+        return np.zeros((0, k), dtype=points.dtype), np.zeros(1, dtype=np.int64), \
+            np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    diff_blocks = []
+    start_blocks = []
+    end_blocks = []
+    for diffs, starts, ends in difference_blocks(points, max_block_pairs):
+        diff_blocks.append(diffs)
+        start_blocks.append(starts)
+        end_blocks.append(ends)
+
+    diffs = np.concatenate(diff_blocks)
+    # Lexsort is stable, so the pairs of each difference vector stay in row major order.
+    order = np.lexsort(diffs.T[::-1])
+    diffs = diffs[order]
+    starts = np.concatenate(start_blocks)[order]
+    ends = np.concatenate(end_blocks)[order]
+
+    is_group_start = np.empty(len(diffs), dtype=bool)
+    is_group_start[0] = True
+    np.any(diffs[1:] != diffs[:-1], axis=1, out=is_group_start[1:])
+    group_starts = np.flatnonzero(is_group_start)
+    offsets = np.append(group_starts, len(diffs))
+
+    # The first pair of each group is the first occurrence of the difference vector.
+    group_order = np.lexsort((ends[group_starts], starts[group_starts]))
+
+    return diffs[group_starts], offsets, starts, ends, group_order
+
+
+class CSRMTPMap:
+    """ Base class of the maps of difference vectors and (starting index, ending index) pair lists of a
+        sorted dataset that are used in place of the dictionary built by SIATECH and keep the pairs in
+        arrays in compressed sparse row (CSR) layout. The pairs of the difference vector of the gth group
+        are (starts[offsets[g]:offsets[g + 1]], ends[offsets[g]:offsets[g + 1]]) in ascending order.
+        Iteration follows the order of the first occurrence of the difference vectors, as in SIATECH.
+
+        Subclasses set the arrays and implement _group, which returns the group of a difference vector
+        or None, _diff, which returns the difference vector of a group, and _diff_nbytes. """
+
+    _offsets = None
+    _starts = None
+    _ends = None
+    _iteration_order = None
+
+    def __len__(self):
+        """ Returns the number of distinct difference vectors. """
+        return len(self._offsets) - 1
+
+    def __contains__(self, diff):
+        return self._group(diff) is not None
+
+    def __getitem__(self, diff):
+        """ Returns the list of (starting index, ending index) pairs of the difference vector. """
+        return self._pairs(self._existing_group(diff))
+
+    def __iter__(self):
+        for g in self._iteration_order.tolist():
+            yield self._diff(g)
+
+    def items(self):
+        """ Iterates the difference vectors and their lists of index pairs. """
+
+        for g in self._iteration_order.tolist():
+            yield self._diff(g), self._pairs(g)
+
+    def start_index_lists(self):
+        """ Iterates the lists of the starting indices of the pairs of the difference vectors
+            in the order of iteration without creating the difference vectors. """
+
+        offsets = self._offsets.tolist()
+        starts = self._starts.tolist()
+        for g in self._iteration_order.tolist():
+            yield starts[offsets[g]:offsets[g + 1]]
+
+    def pair_count(self, diff):
+        """ Returns the number of index pairs of the difference vector. """
+
+        g = self._group(diff)
+        if g is None:
+            return 0
+
+        return int(self._offsets[g + 1] - self._offsets[g])
+
+    def starts(self, diff):
+        """ Returns the starting indices of the pairs of the difference vector as an array. """
+
+        g = self._existing_group(diff)
+        return self._starts[self._offsets[g]:self._offsets[g + 1]]
+
+    def ends(self, diff):
+        """ Returns the ending indices of the pairs of the difference vector as an array. """
+
+        g = self._existing_group(diff)
+        return self._ends[self._offsets[g]:self._offsets[g + 1]]
+
+    def nbytes(self):
+        """ Returns the number of bytes used by the arrays of the map. """
+
+        return self._diff_nbytes() + self._offsets.nbytes + self._starts.nbytes + self._ends.nbytes \
+            + self._iteration_order.nbytes
+
+    def _group(self, diff):
+        raise NotImplementedError
+
+    def _diff(self, g):
+        raise NotImplementedError
+
+    def _diff_nbytes(self):
+        raise NotImplementedError
+
+    def _existing_group(self, diff):
+        g = self._group(diff)
+        if g is None:
+            raise KeyError(diff)
+
+        return g
+
+    def _pairs(self, g):
+        begin = self._offsets[g]
+        end = self._offsets[g + 1]
+        return list(zip(self._starts[begin:end].tolist(), self._ends[begin:end].tolist()))
+
+
+class ArrayMTPMap(CSRMTPMap):
+    """ CSRMTPMap of the groups of group_difference_pairs. A difference vector is found by
+        binary search over the sorted columns of the distinct difference vectors. """
+
+    _columns = None
+
+    def __init__(self, sorted_dataset, max_block_pairs=MAX_BLOCK_PAIRS):
+        points = dataset_to_array(sorted_dataset)
+        diffs, self._offsets, self._starts, self._ends, self._iteration_order = \
+            group_difference_pairs(points, max_block_pairs)
+        self._columns = [np.ascontiguousarray(diffs[:, c]) for c in range(diffs.shape[1])]
+
+    def _group(self, diff):
+        components = diff.components()
+        if len(components) != len(self._columns):
+            return None
+
+        # The rows with the same leading components are consecutive, and the next column is sorted within them.
+        begin = 0
+        end = len(self)
+        for column, component in zip(self._columns, components):
+            rows = column[begin:end]
+            begin, end = begin + int(np.searchsorted(rows, component, 'left')), \
+                begin + int(np.searchsorted(rows, component, 'right'))
+            if begin == end:
+                return None
+
+        return begin
+
+    def _diff(self, g):
+        return Vector([column[g].item() for column in self._columns])
+
+    def _diff_nbytes(self):
+        return sum([column.nbytes for column in self._columns])
+
+
+def compute_mtp_map(sorted_dataset, max_block_pairs=MAX_BLOCK_PAIRS):
+    """ Computes the same map of difference vectors and (starting index, ending index) pair lists
+        as SIATECH for the sorted dataset by using NumPy. The map is returned as an ArrayMTPMap. """
+
+    return ArrayMTPMap(sorted_dataset, max_block_pairs)
+
+
+def siah_np(d, max_block_pairs=MAX_BLOCK_PAIRS):
+    """ Computes the MTPs of dataset d as SIAH does, but computes and
+        groups the difference vectors with NumPy. """
+
+    d = Dataset.sort_ascending(d)
+    points = dataset_to_array(d)
+    diffs, offsets, starts, _, order = group_difference_pairs(points, max_block_pairs)
+
+    # The patterns are slices of the starting points of all pairs in the order of the groups.
+    vectors = [d[i] for i in range(len(d))]
+    offsets = offsets.tolist()
+    order = order.tolist()
+
+    with cyclic_gc_paused():
+        start_points = list(map(vectors.__getitem__, starts.tolist()))
+        diff_vectors = list(map(Vector, diffs[order].tolist()))
+        patterns = [start_points[offsets[g]:offsets[g + 1]] for g in order]
+        return list(zip(diff_vectors, patterns))
+
+
+def siatech_np(d, max_block_pairs=MAX_BLOCK_PAIRS):
+    """ Computes the TECs of dataset d as SIATECH does, but builds
+        the map of difference vectors with NumPy. """
+
+    d = Dataset.sort_ascending(d)
+    return tecs_from_mtp_map(compute_mtp_map(d, max_block_pairs), d)
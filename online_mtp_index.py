@@ -0,0 +1,171 @@
+from bisect import bisect_right
+from itertools import chain
+from dataset import Dataset
+from new_algorithms import MTPIndex
+from pattern import Pattern
+from helpers import vec
+
+
+""" Contains an index of the MTPs of a dataset that grows one point at a time, as when notes are
+    received in real time. Adding a point only adds the difference vectors between it and the
+    points already in the index, so the MTPs and TECs can be reported at any time without
+    computing the difference vectors of all pairs of points again. """
+
+
+class OnlineMTPIndex:
+    """ The MTPs of the points added so far. The points are kept in ascending order, and each difference
+        vector has the list of the starting points of its pairs in ascending order, so that the
+        MTPs are the same as those computed by SIAH for the points. The ending points of the pairs are
+        kept in a parallel list, as the sum of a starting point and the difference vector is not always
+        exactly the ending point if the components are floats. A point is usually added after the
+        points with smaller onsets, in which case it is inserted at the end of the points.
+
+        The order of the difference vectors and their lists of (starting index, ending index) pairs, which
+        are needed for the reports, are kept up to date while the points are added at the end: the pairs of
+        the new point come last in the lists of their vectors, and the new vectors are appended to the
+        vectors whose first pair starts from the same point. Inserting a point elsewhere shifts the indices
+        of the later points, so the order and the index pairs are then computed again for the next report.
+        The vectorized pattern of each MTP is kept until its difference vector gets a new pair. """
+
+    _points = None
+    _starts = None
+    _ends = None
+    _index_pairs = None
+    _diffs_by_first_start = None
+    _vectorized_patterns = None
+
+    def __init__(self, points=()):
+        self._points = []
+        self._starts = {}
+        self._ends = {}
+        self._index_pairs = {}
+        self._diffs_by_first_start = []
+        self._vectorized_patterns = {}
+
+        for point in points:
+            self.add_point(point)
+
+    def __len__(self):
+        return len(self._points)
+
+    def add_point(self, point):
+        """ Adds a point and the difference vectors between it and the points in the index. """
+
+        position = bisect_right(self._points, point)
+        if position < len(self._points):
+            self._index_pairs = None
+            self._diffs_by_first_start = None
+
+        for i, other in enumerate(self._points):
+            if other <= point:
+                diff = point - other
+                start, end = other, point
+            else:
+                diff = other - point
+                start, end = point, other
+
+            if diff in self._starts:
+                starts = self._starts[diff]
+                pair_position = bisect_right(starts, start)
+                starts.insert(pair_position, start)
+                self._ends[diff].insert(pair_position, end)
+                self._vectorized_patterns.pop(diff, None)
+                if self._index_pairs is not None:
+                    self._index_pairs[diff].append((i, position))
+            else:
+                self._starts[diff] = [start]
+                self._ends[diff] = [end]
+                if self._index_pairs is not None:
+                    self._index_pairs[diff] = [(i, position)]
+                    self._diffs_by_first_start[i].append(diff)
+
+        self._points.insert(position, point)
+        if self._diffs_by_first_start is not None:
+            self._diffs_by_first_start.append([])
+
+    def add_points(self, points):
+        for point in points:
+            self.add_point(point)
+
+    def get_dataset(self):
+        """ Returns the points as a sorted dataset. """
+        return Dataset.from_vectors(self._points)
+
+    def mtps(self):
+        """ Returns the MTPs as a list of (difference vector, pattern) tuples in the same order as SIAH,
+            which is the order of the first pairs of the difference vectors. """
+
+        mtps = []
+        for diff in self._ordered_diffs():
+            mtps.append((diff, list(self._starts[diff])))
+
+        return mtps
+
+    def tecs(self):
+        """ Returns the TECs of the points as computed by SIATECH. If some point has been added more than once,
+            the map of difference vectors is computed for the points again. """
+
+        dataset = self.get_dataset()
+        if not dataset.has_unique_vectors():
+            return MTPIndex(dataset).tecs()
+
+        # The patterns are collected as in MTPIndex.unique_patterns but with the stored vectorized patterns.
+        mtp_map = {}
+        patterns = []
+        handled_patterns = set()
+        for diff in self._ordered_diffs():
+            index_pairs = self._index_pairs[diff]
+            mtp_map[diff] = index_pairs
+
+            vectorized_pattern = self._vectorized_pattern(diff)
+            if vectorized_pattern not in handled_patterns:
+                handled_patterns.add(vectorized_pattern)
+                patterns.append((list(self._starts[diff]), [index_pair[0] for index_pair in index_pairs],
+                                 vectorized_pattern))
+
+        index = MTPIndex(dataset, mtp_map)
+        index.compute_translators(patterns)
+
+        tecs = []
+        for pattern, pattern_indices, vectorized_pattern in patterns:
+            tecs.append(index.tec(pattern, pattern_indices, vectorized_pattern))
+
+        return tecs
+
+    def _vectorized_pattern(self, diff):
+        if diff not in self._vectorized_patterns:
+            self._vectorized_patterns[diff] = Pattern(vec(self._starts[diff]))
+
+        return self._vectorized_patterns[diff]
+
+    def _ordered_diffs(self):
+        """ Returns the difference vectors in the order of their first pairs. """
+
+        if self._index_pairs is None:
+            self._compute_index_pairs()
+
+        return list(chain.from_iterable(self._diffs_by_first_start))
+
+    def _compute_index_pairs(self):
+        """ Computes the lists of (starting index, ending index) pairs of the difference vectors and
+            groups the vectors by the starting index of their first pairs in the order of the ending indices.
+            The first pair of a repeated point starts from its first index. """
+
+        indices = {}
+        for i in range(len(self._points)):
+            indices.setdefault(self._points[i], i)
+
+        first_pairs = []
+        self._index_pairs = {}
+        for diff, starts in self._starts.items():
+            ends = self._ends[diff]
+            self._index_pairs[diff] = [(indices[starts[k]], indices[ends[k]]) for k in range(len(starts))]
+
+            first_start = indices[starts[0]]
+            first_end = max(indices[ends[0]], first_start + 1)
+            first_pairs.append((first_start, first_end, diff))
+
+        first_pairs.sort(key=lambda first_pair: first_pair[:2])
+        self._diffs_by_first_start = [[] for _ in self._points]
+        for first_start, _, diff in first_pairs:
+            self._diffs_by_first_start[first_start].append(diff)
@@ -1,16 +1,29 @@
+import numpy as np
 from vector import Vector
 from functools import cmp_to_key
 from copy import deepcopy
 from operator import itemgetter
-from dataset import Dataset
+from heapq import heappush, heappop
+from dataset import Dataset, dataset_to_array
 import heuristics
-from tec import TEC
-from new_algorithms import siatech
+import bitset
+from tec import TEC, IndexedTEC
+from new_algorithms import siatech, MTPIndex
+from incremental_mtp_index import IncrementalMTPIndex
+from numpy_engine import MAX_BLOCK_PAIRS, row_blocks, block_pairs
 from helpers import vec
+import parallel
 
 """ Contains implementations of algorithms based on SIA [Meredith2002]. """
 
 
+# Upper limit for the number of translated points looked up at once by find_mtps.
+MAX_TRANSLATED_POINTS = 2 ** 22
+
+# Number of MTPs handed to a worker process at a time in the parallel compactness trawl.
+TRAWL_CHUNK_SIZE = 64
+
+
 def sia(d):
     """ Implements SIA as described in [Meredith2002]
 
@@ -251,24 +264,108 @@ def siatec_compress(d):
     return compute_encoding(tecs, d)
 
 
+def siatec_compress_indexed(d):
+    """ Computes the same encoding as siatec_compress without building the vector tables V and W of
+        [Meredith2013]. The MTPs are read from the map of SIATECH, which only holds the pairs of
+        points whose difference vector is positive, and the TECs and their conjugates are computed
+        as IndexedTECs. Only the TECs of the encoding are materialized as TEC objects.
+
+        The translators are found by matching difference vectors as in SIATECH, so datasets with
+        repeated points or inexact difference vectors are encoded with siatec_compress. """
+
+    d = Dataset.sort_ascending(d)
+    if not d.has_unique_vectors() or not d.has_exact_differences():
+        return siatec_compress(d)
+
+    index = MTPIndex(d)
+
+    tecs = []
+    for pattern_indices, vectorized_pattern in compress_mtp_patterns(index.get_mtp_map(), d):
+        if len(pattern_indices) == len(d):
+            tecs.append(IndexedTEC(d, pattern_indices, [pattern_indices]))
+        else:
+            tecs.append(index.indexed_tec(pattern_indices, vectorized_pattern))
+
+    # The conjugates follow the TECs as in add_conjugate_tecs.
+    originals = {}
+    for i in range(len(tecs)):
+        conj = get_indexed_conj(tecs[i])
+        originals[id(conj)] = tecs[i]
+        tecs.append(conj)
+
+    sort_tecs_by_quality(tecs, d)
+
+    encoding = []
+    for tec in compute_encoding(tecs, d):
+        if isinstance(tec, IndexedTEC) and id(tec) in originals:
+            encoding.append(get_conj(indexed_tec_to_tec(originals[id(tec)]), d))
+        elif isinstance(tec, IndexedTEC):
+            encoding.append(indexed_tec_to_tec(tec))
+        else:
+            encoding.append(tec)
+
+    return encoding
+
+
+def compress_mtp_patterns(mtp_map, d):
+    """ Returns the MTPs that remain in SIATECCompress after remove_trans_eq_mtps as a list of
+        (pattern indices, vectorized pattern) tuples in the same order, computed from the map of
+        SIATECH of the sorted dataset d without repeated points.
+
+        In [Meredith2013] the MTP of a difference vector u is the set of points p for which p + u
+        is in the dataset, and the MTPs are in ascending order of u. For negative u these are the ending
+        points of the pairs of -u in the map, and the MTP of the zero vector is the whole dataset.
+        The MTP of a positive vector u is translationally equivalent to the MTP of -u, which comes first,
+        so the first MTP of each vectorized pattern is the MTP of the smallest negative vector. """
+
+    negative = {}
+    for diff_vec, pairs in mtp_map.items():
+        ends = [index_pair[1] for index_pair in pairs]
+        vectorized_pattern = tuple(vec([d[i] for i in ends]))
+        if vectorized_pattern not in negative or negative[vectorized_pattern][0] < diff_vec:
+            negative[vectorized_pattern] = (diff_vec, ends, vectorized_pattern)
+
+    # The negative vector -u comes before -u' if u is greater than u'.
+    mtps = []
+    for _, ends, vectorized_pattern in sorted(negative.values(), key=itemgetter(0), reverse=True):
+        mtps.append((ends, vectorized_pattern))
+
+    all_indices = list(range(len(d)))
+    mtps.append((all_indices, tuple(vec([d[i] for i in all_indices]))))
+
+    return mtps
+
+
+def get_indexed_conj(tec):
+    """ Returns the conjugate of an IndexedTEC whose translators contain the zero vector as an IndexedTEC.
+        The pattern of the conjugate consists of the translated first points of the pattern, so the
+        occurrences of the conjugate are the transposed occurrences of the TEC. """
+
+    occurrences = tec.get_occurrences()
+    return IndexedTEC(tec.get_dataset(), occurrences[:, 0], occurrences.T)
+
+
+def indexed_tec_to_tec(tec):
+    """ Returns an IndexedTEC as a TEC. """
+    return TEC(tec.get_pattern(), tec.get_pattern_indices(), tec.get_translators())
+
+
 def remove_trans_eq_mtps(mcps):
     """ Removes translationally equivalent MTPs from mcps by
         removing redundant copies of MTPs that have the same
-        vectorized representation. """
+        vectorized representation. The first copy of each MTP is kept.
+        The vectorized representations are hashed as tuples of vectors, so mcps is processed in one pass. """
 
-    i = 0
-    while i < len(mcps):
-        mcp = mcps[i]
-        vectorized = vec(mcp[0])
+    seen = set()
+    unique_mcps = []
 
-        j = i + 1
-        while j < len(mcps):
-            if vectorized == vec(mcps[j][0]):
-                mcps.pop(j)
-            else:
-                j += 1
+    for mcp in mcps:
+        vectorized = tuple(vec(mcp[0]))
+        if vectorized not in seen:
+            seen.add(vectorized)
+            unique_mcps.append(mcp)
 
-        i += 1
+    mcps[:] = unique_mcps
 
 
 def compute_tecs_from_mcps(d, v, mcps):
@@ -289,7 +386,11 @@ def add_conjugate_tecs(tecs, d):
 
 
 def sort_tecs_by_quality(tecs, sorted_dataset):
-    tecs.sort(key=cmp_to_key(lambda tec1, tec2: tec_quality_cmp(tec1, tec2, sorted_dataset)))
+    """ Sorts the TECs from the best to the worst as defined by is_better_tec. Each TEC is scored once
+        by its TECQualityKey instead of in every comparison. The key orders the TECs in the same
+        way as tec_quality_cmp, so the sorted order is the same. """
+
+    tecs.sort(key=lambda tec: tec_quality_key(tec, sorted_dataset))
 
 
 def tec_quality_cmp(tec1, tec2, sorted_dataset):
@@ -300,45 +401,76 @@ def tec_quality_cmp(tec1, tec2, sorted_dataset):
 
 
 def compute_encoding(tecs, d):
-    """ Implements algorithm in Figure 7 of [Meredith2013]. """
+    """ Implements algorithm in Figure 7 of [Meredith2013].
+        The cover is tracked as a bitset of the points in d, see split_coverage. """
 
+    point_count = len(set(d))
     best_tecs = []
-    cover = []
+    cover = 0
+    outside_cover = set()
 
-    for i in range(0, len(tecs)):
-        tec = tecs[i]
-        s = tec.coverage()
-        s_diff_cover = deepcopy(s)
-        for p in cover:
-            if p in s_diff_cover:
-                s_diff_cover.remove(p)
+    for tec in tecs:
+        s, outside_s = split_coverage(tec, d)
+        s_diff_cover = bitset.and_not(s, cover)
+        outside_s_diff_cover = outside_s - outside_cover
 
-        if len(s_diff_cover) > len(tec.get_pattern()) + len(tec.get_translators()) - 1:
+        if bitset.popcount(s_diff_cover) + len(outside_s_diff_cover) > \
+                len(tec.get_pattern()) + len(tec.get_translators()) - 1:
             best_tecs.append(tec)
-            cover += s
-
-            dataset_covered = True
-            for p in d:
-                if p not in cover:
-                    dataset_covered = False
-                    break
+            cover = bitset.union(cover, s)
+            outside_cover |= outside_s_diff_cover
 
-            if dataset_covered:
+            if bitset.popcount(cover) == point_count:
                 break
 
-    residual = set(d) - set(cover)
+    residual = set(d) - set([d[i] for i in bitset.to_indices(cover)])
     if residual:
         best_tecs.append(TEC(list(residual), [], []))
 
     return best_tecs
 
 
+def split_coverage(tec, d):
+    """ Returns the points covered by the TEC as a bitset of the points in the dataset d
+        and a set of the points that are not in d. Such points only arise when the sums of the
+        float components of the pattern and the translators are inexact. """
+
+    if isinstance(tec, IndexedTEC) and tec.get_dataset() is d:
+        return bitset.coverage(tec, d), set()
+
+    coverage = list(tec.coverage())
+    indices = d.indices_of(coverage)
+    outside = set([coverage[i] for i in np.flatnonzero(indices < 0).tolist()])
+    return bitset.from_indices(indices[indices >= 0], len(d)), outside
+
+
+def extended_coverages(tecs, d):
+    """ Returns the points covered by each TEC as a bitset and the number of indices used by the bitsets.
+        The points of the dataset d are represented by their indices in d, and the other covered points,
+        see split_coverage, by the indices that follow them. """
+
+    outside_indices = {}
+    coverages = []
+    for tec in tecs:
+        coverage, outside = split_coverage(tec, d)
+        if outside:
+            for point in outside:
+                outside_indices.setdefault(point, len(d) + len(outside_indices))
+
+            coverage |= bitset.from_indices([outside_indices[point] for point in outside],
+                                            len(d) + len(outside_indices))
+
+        coverages.append(coverage)
+
+    return coverages, len(d) + len(outside_indices)
+
+
 def get_best_tec(p, d):
     """ Finds the best TEC in p, the copy of the dataset d. Implements algorithm in Figure 2 of [Meredith2013].  """
 
     v, w = compute_vector_tables(p)
     mcps = compute_mtp_cis_pairs(v)
-    best_tec = None
+    best_key = None
 
     for i in range(0, len(mcps)):
         mcp = mcps[i]
@@ -346,25 +478,28 @@ def get_best_tec(p, d):
         tec = get_tec_for_mtp(mtp_indices, w, p)
         conj = get_conj(tec, d)
 
-        if not best_tec or is_better_tec(tec, best_tec, d):
-            best_tec = tec
-        if is_better_tec(conj, best_tec, d):
-            best_tec = conj
+        tec_key = tec_quality_key(tec, d)
+        if not best_key or tec_key < best_key:
+            best_key = tec_key
+        conj_key = tec_quality_key(conj, d)
+        if conj_key < best_key:
+            best_key = conj_key
 
-    return best_tec
+    return best_key.get_tec()
 
 
 def get_best_tech(p, d):
     """ Finds the best TEC in p by using SIATECH.  """
 
     tecs = siatech(p)
-    best_tec = None
+    best_key = None
 
     for tec in tecs:
-        if not best_tec or is_better_tec(tec, best_tec, d):
-            best_tec = tec
+        tec_key = tec_quality_key(tec, d)
+        if not best_key or tec_key < best_key:
+            best_key = tec_key
 
-    return best_tec
+    return best_key.get_tec()
 
 
 def compute_vector_tables(p):
@@ -475,6 +610,66 @@ def get_conj(tec, sorted_dataset):
     return conj_tec
 
 
+def tec_quality_key(tec, sorted_dataset):
+    """ Returns a key that orders TECs in the same way as is_better_tec: tec1 is better than tec2
+        if and only if the key of tec1 is smaller than the key of tec2. """
+    return TECQualityKey(tec, sorted_dataset)
+
+
+# The criteria of is_better_tec in the order they are compared, negated where greater is better.
+QUALITY_CRITERIA = [
+    lambda tec, sorted_dataset: -heuristics.compression_ratio(tec),
+    lambda tec, sorted_dataset: -heuristics.bounding_box_compactness(tec, sorted_dataset),
+    lambda tec, sorted_dataset: -tec.coverage_size(),
+    lambda tec, sorted_dataset: -tec.pattern_size(),
+    lambda tec, sorted_dataset: heuristics.pattern_width(tec),
+    lambda tec, sorted_dataset: heuristics.pattern_volume(tec)
+]
+
+
+class TECQualityKey:
+    """ Sort key for TECs that orders them as is_better_tec does. The value of each criterion is computed
+        the first time a comparison needs it and then kept, so a TEC is scored only once however many
+        times it is compared, and the later criteria are only computed to break ties. """
+
+    _tec = None
+    _sorted_dataset = None
+    _values = None
+
+    def __init__(self, tec, sorted_dataset):
+        self._tec = tec
+        self._sorted_dataset = sorted_dataset
+        self._values = []
+
+    def get_tec(self):
+        return self._tec
+
+    def value(self, i):
+        """ Returns the value of the ith criterion of QUALITY_CRITERIA. """
+
+        while len(self._values) <= i:
+            criterion = QUALITY_CRITERIA[len(self._values)]
+            self._values.append(criterion(self._tec, self._sorted_dataset))
+
+        return self._values[i]
+
+    def __lt__(self, other):
+        for i in range(len(QUALITY_CRITERIA)):
+            if self.value(i) < other.value(i):
+                return True
+            if self.value(i) > other.value(i):
+                return False
+
+        return False
+
+    def __eq__(self, other):
+        for i in range(len(QUALITY_CRITERIA)):
+            if self.value(i) != other.value(i):
+                return False
+
+        return True
+
+
 def is_better_tec(tec1, tec2, sorted_dataset):
     """ Implements algorithm from Figure 5 of [Meredith2013].
         Added else ifs so that the algorithm works correctly as described in the article text. """
@@ -512,9 +707,10 @@ def is_better_tec(tec1, tec2, sorted_dataset):
     return False
 
 
-def siact(d, compactness_th, cardinality_th, mtp_algorithm=sia):
+def siact(d, compactness_th, cardinality_th, mtp_algorithm=sia, processes=1):
     """ Implements the SIACT algorithm defined in Definition 7.2 of [Collins2011].
-        Takes as its parameter the mtp_algorithm used for finding the MTPs of dataset d. """
+        Takes as its parameter the mtp_algorithm used for finding the MTPs of dataset d.
+        If processes is other than 1, the MTPs are trawled in a pool of that many processes (None uses all CPUs). """
 
     # First find MTPs of the dataset.
     mtps = mtp_algorithm(d)
@@ -522,12 +718,41 @@ def siact(d, compactness_th, cardinality_th, mtp_algorithm=sia):
     # Compactness trawl through each MTP
     compacted_mtps = []
 
-    for mtp in mtps:
-        compacted_mtps += compactness_trawl(mtp, compactness_th, cardinality_th, d)
+    if processes == 1 or len(mtps) <= TRAWL_CHUNK_SIZE:
+        for mtp in mtps:
+            compacted_mtps += trawl_mtp(mtp, compactness_th, cardinality_th, d)
+
+        return compacted_mtps
+
+    # Build the index map of the dataset before the worker processes are started.
+    d.index_map()
+    state = (mtps, compactness_th, cardinality_th, d)
+    for trawled_mtps in parallel.imap_with_shared_state(_trawl_mtp, range(len(mtps)), state, processes,
+                                                        TRAWL_CHUNK_SIZE):
+        compacted_mtps += trawled_mtps
 
     return compacted_mtps
 
 
+def _trawl_mtp(i):
+    mtps, compactness_th, cardinality_th, dataset = parallel.shared_state()
+    return trawl_mtp(mtps[i], compactness_th, cardinality_th, dataset)
+
+
+def trawl_mtp(mtp, compactness_th, cardinality_th, dataset):
+    """ Performs compactness trawling on an MTP of the dataset. If the dataset has no repeated points,
+        compactness_trawl_indexed is used with the indices of the points in the dataset. Patterns of a single
+        point have no subpatterns to trawl, so they are passed to compactness_trawl as they are. """
+
+    pattern = mtp[1]
+    if len(pattern) > 1:
+        point_indices = dataset.index_map()
+        if len(point_indices) == len(dataset) and all(point in point_indices for point in pattern):
+            return compactness_trawl_indexed(mtp, point_indices, compactness_th, cardinality_th)
+
+    return compactness_trawl(mtp, compactness_th, cardinality_th, dataset)
+
+
 def compactness_trawl(mtp, compactness_th, cardinality_th, sorted_dataset):
     """ Performs compactness trawling on an MTP as defined in Definition 7.2 of [Collins2011].
         Returns a list of patterns obtained from the input mtp.
@@ -564,9 +789,47 @@ def compactness_trawl(mtp, compactness_th, cardinality_th, sorted_dataset):
     return compacted_mtps
 
 
-def siar(d, r):
+def compactness_trawl_indexed(mtp, point_indices, compactness_th, cardinality_th):
+    """ Performs the same compactness trawling as compactness_trawl on an MTP of a dataset
+        without repeated points. point_indices maps each point of the dataset to its index, as returned by
+        Dataset.index_map, so the compactness of each subpattern is computed from the indices of its first
+        and last points in O(1) time instead of searching them from the dataset. """
+
+    diff_vector = mtp[0]
+    pattern = mtp[1]
+
+    compacted_mtps = []
+    i = 0
+    whole_pattern_compact = True
+
+    for j in range(len(pattern) - 1):
+        # The selection begins at the first point only if it is not after the last point, as in
+        # heuristics.find_pattern_indices.
+        begin = point_indices[pattern[i]]
+        end = point_indices[pattern[j + 1]]
+        if begin > end:
+            begin = 0
+
+        compactness = (j + 2 - i) / (end + 1 - begin)
+        if compactness < compactness_th:
+            whole_pattern_compact = False
+            compact_pattern = pattern[i:j + 1]
+
+            if len(compact_pattern) >= cardinality_th:
+                compacted_mtps.append((diff_vector, compact_pattern))
+
+            i = j + 1
+
+    if whole_pattern_compact and len(pattern) >= cardinality_th:
+        compacted_mtps.append(mtp)
+
+    return compacted_mtps
+
+
+def siar(d, r, max_mtps=None):
     """ Implements SIAR as defined in [Collins2011] and [Meredith2016] Fig.13.14.
-        Takes as parameters the dataset d and the number of subdiagonals r."""
+        Takes as parameters the dataset d and the number of subdiagonals r.
+        If max_mtps is given, only the MTPs of the max_mtps most frequent within-pattern vectors are computed. """
 
     d = Dataset.sort_ascending(d)
 
@@ -578,54 +841,92 @@ def siar(d, r):
             diffs_on_diagonals.append((d[j] - d[i], i))
             j += 1
 
-    # Store patterns in transl_patterns by sorting and segmenting diffs_on_diagonals
+    # Store patterns in transl_patterns by sorting and segmenting diffs_on_diagonals.
+    # The patterns are stored as lists of indices of their points.
     diffs_on_diagonals.sort()
     transl_patterns = []
     diff_vec = diffs_on_diagonals[0][0]
-    pattern_points = [d[diffs_on_diagonals[0][1]]]
+    pattern_indices = [diffs_on_diagonals[0][1]]
     for i in range(1, len(diffs_on_diagonals)):
         if diffs_on_diagonals[i][0] == diff_vec:
-            pattern_points.append(d[diffs_on_diagonals[i][1]])
+            pattern_indices.append(diffs_on_diagonals[i][1])
         else:
-            transl_patterns.append(pattern_points)
-            pattern_points = [d[diffs_on_diagonals[i][1]]]
+            transl_patterns.append(pattern_indices)
+            pattern_indices = [diffs_on_diagonals[i][1]]
             diff_vec = diffs_on_diagonals[i][0]
 
-    transl_patterns.append(pattern_points)
-
-    # For each pattern in transl_patterns, find difference vectors between pattern points
-    # and store in within_pattern_diffs
-    within_pattern_diffs = []
-    for i in range(0, len(transl_patterns)):
-        pattern_points = transl_patterns[i]
-        for j in range(0, len(pattern_points) - 1):
-            for k in range(j + 1, len(pattern_points)):
-                within_pattern_diffs.append(pattern_points[k] - pattern_points[j])
-
-    # Remove duplicates from within_pattern_diffs and order vectors by decreasing frequency.
-    within_pattern_diffs.sort()
-    within_patt_diffs_sorted_by_freq = []
-
-    if within_pattern_diffs:
-        diff_vec = within_pattern_diffs[0]
-        freq = 1
-        for i in range(1, len(within_pattern_diffs)):
-            if within_pattern_diffs[i] == diff_vec:
-                freq += 1
-            else:
-                within_patt_diffs_sorted_by_freq.append((diff_vec, freq))
-                freq = 1
-                diff_vec = within_pattern_diffs[i]
+    transl_patterns.append(pattern_indices)
 
-        within_patt_diffs_sorted_by_freq.append((diff_vec, freq))
-        within_patt_diffs_sorted_by_freq.sort(key=itemgetter(1), reverse=True)
+    # Find the difference vectors between the points of each pattern and order them by decreasing frequency.
+    within_patt_diffs_sorted_by_freq = count_within_pattern_diffs(d, transl_patterns)
+    if max_mtps is not None:
+        within_patt_diffs_sorted_by_freq = within_patt_diffs_sorted_by_freq[:max_mtps]
 
     # Find the MTP for each vector in within_patt_diffs_sorted_by_freq, store it in mtps and return mtps
-    mtps = []
+    diff_vecs = []
     for i in range(0, len(within_patt_diffs_sorted_by_freq)):
-        mtps.append(find_mtp(d, within_patt_diffs_sorted_by_freq[i][0]))
+        diff_vecs.append(within_patt_diffs_sorted_by_freq[i][0])
 
-    return mtps
+    return find_mtps(d, diff_vecs)
+
+
+def count_within_pattern_diffs(d, transl_patterns, max_block_pairs=MAX_BLOCK_PAIRS):
+    """ Counts the difference vectors between the points of each pattern, given as lists of ascending indices
+        of the points in the sorted dataset d. Returns the distinct vectors and their frequencies as
+        (difference vector, frequency) tuples in order of decreasing frequency, and equally frequent vectors
+        in ascending order. The differences of blocks of at most about max_block_pairs pairs of points are
+        computed and merged into the counts with NumPy, so only the distinct vectors are kept between blocks. """
+
+    points = dataset_to_array(d)
+    diffs = np.zeros((0, points.shape[1]), dtype=points.dtype)
+    counts = np.zeros(0, dtype=np.int64)
+    start_blocks = []
+    end_blocks = []
+    pair_count = 0
+
+    for pattern_indices in transl_patterns:
+        pattern_indices = np.asarray(pattern_indices, dtype=np.int64)
+        for begin, end in row_blocks(len(pattern_indices), max_block_pairs):
+            starts, ends = block_pairs(len(pattern_indices), begin, end)
+            start_blocks.append(pattern_indices[starts])
+            end_blocks.append(pattern_indices[ends])
+            pair_count += len(starts)
+
+            if pair_count >= max_block_pairs:
+                diffs, counts = add_diff_counts(points, diffs, counts, start_blocks, end_blocks)
+                start_blocks = []
+                end_blocks = []
+                pair_count = 0
+
+    diffs, counts = add_diff_counts(points, diffs, counts, start_blocks, end_blocks)
+
+    # The distinct vectors are in ascending order, which the stable sort keeps for equal frequencies.
+    order = np.argsort(-counts, kind='stable')
+    return list(zip(map(Vector, diffs[order].tolist()), counts[order].tolist()))
+
+
+def add_diff_counts(points, diffs, counts, start_blocks, end_blocks):
+    """ Adds the difference vectors of the pairs of points in the blocks of starting and ending indices to the
+        ascending distinct vectors diffs and their frequencies counts. Returns the updated diffs and counts. """
+
+    if not start_blocks:
+        return diffs, counts
+
+    starts = np.concatenate(start_blocks)
+    ends = np.concatenate(end_blocks)
+
+    # Adding zero turns negative zeros into positive zeros, which are equal as components of vectors.
+    all_diffs = np.concatenate((diffs, points[ends] - points[starts] + 0))
+    all_counts = np.concatenate((counts, np.ones(len(starts), dtype=np.int64)))
+
+    order = np.lexsort(all_diffs.T[::-1])
+    all_diffs = all_diffs[order]
+
+    is_group_start = np.ones(len(all_diffs), dtype=bool)
+    np.any(all_diffs[1:] != all_diffs[:-1], axis=1, out=is_group_start[1:])
+    group_starts = np.flatnonzero(is_group_start)
+
+    return all_diffs[group_starts], np.add.reduceat(all_counts[order], group_starts)
 
 
 def find_mtp(d, diff_vec):
@@ -654,6 +955,52 @@ def find_mtp(d, diff_vec):
     return mtp
 
 
+def find_mtps(d, diff_vecs):
+    """ Finds the MTPs of the difference vectors in the sorted dataset d as find_mtp does. The dataset is
+        translated by blocks of difference vectors at once with NumPy, and the translated points are
+        looked up from the points of d by binary search, so no vectors are created for points that are
+        not in the MTPs. Datasets with repeated points are handled by find_mtp. """
+
+    if not diff_vecs or not d.has_unique_vectors():
+        return [find_mtp(d, diff_vec) for diff_vec in diff_vecs]
+
+    points = dataset_to_array(d)
+    point_keys = row_keys(points)
+    order = np.argsort(point_keys)
+    sorted_keys = point_keys[order]
+
+    n = len(points)
+    block_size = max(1, MAX_TRANSLATED_POINTS // n)
+    mtps = []
+
+    for begin in range(0, len(diff_vecs), block_size):
+        block = diff_vecs[begin:begin + block_size]
+        diffs = np.array([diff_vec.components() for diff_vec in block], dtype=points.dtype)
+
+        translated_keys = row_keys((points[np.newaxis, :, :] - diffs[:, np.newaxis, :]).reshape(-1, points.shape[1]))
+        positions = np.minimum(np.searchsorted(sorted_keys, translated_keys), n - 1)
+        found = (sorted_keys[positions] == translated_keys).reshape(len(block), n)
+        indices = order[positions].reshape(len(block), n)
+
+        for diff_vec, row_found, row_indices in zip(block, found, indices):
+            # The translated points are in ascending order. Rounding can map two points onto the same point,
+            # which find_mtp only matches once.
+            mtp_indices = row_indices[row_found]
+            is_first = np.ones(len(mtp_indices), dtype=bool)
+            is_first[1:] = mtp_indices[1:] != mtp_indices[:-1]
+            mtps.append((diff_vec, [d[i] for i in mtp_indices[is_first].tolist()]))
+
+    return mtps
+
+
+def row_keys(rows):
+    """ Returns the rows of a two dimensional array as byte strings, so that equal rows have equal keys.
+        Negative zeros are turned into positive zeros first. """
+
+    rows = np.ascontiguousarray(rows + 0)
+    return rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+
+
 def forths_algorithm(d, c_min, sigma_min):
     """ Implements Forth's algorithm [Forth2012], [Meredith2016].
         Returns two lists of TECs, primary and secondary TECs. """
@@ -714,18 +1061,49 @@ def compute_tec_saliences(tecs, d):
 
 def compute_max_compactness(tec, d):
     """ Returns the maximum compactness of any occurrence of the pattern of the TEC.
-        This does not take voice information into consideration as in [Forth2012] eq. 3.13. """
+        This does not take voice information into consideration as in [Forth2012] eq. 3.13.
+        The occurrence of the pattern is included even if the translators do not contain the zero vector.
 
-    translators = tec.get_translators()
+        The compactness of an occurrence only depends on the indices of its first and last points as
+        found by heuristics.find_pattern_indices. For datasets without repeated points these are looked up
+        for all occurrences at once and the compactnesses computed with NumPy. The TEC is not modified. """
 
-    zero_vector = Vector.zero_vector(translators[0].dimensionality())
-    if zero_vector not in translators:
-        translators.append(zero_vector)
+    pattern = tec.get_pattern()
+    pattern_size = len(pattern)
+
+    if not isinstance(d, Dataset) or not d.has_unique_vectors():
+        return compute_max_compactness_by_scanning(tec, d)
+
+    if isinstance(tec, IndexedTEC) and tec.get_dataset() is d:
+        occurrences = tec.get_occurrences()
+        first_indices = np.append(occurrences[:, 0], tec.get_pattern_indices()[0])
+        last_indices = np.append(occurrences[:, -1], tec.get_pattern_indices()[-1])
+    else:
+        translators = occurrence_translators(tec)
+        first_indices = d.indices_of([pattern[0] + translator for translator in translators])
+        last_indices = d.indices_of([pattern[pattern_size - 1] + translator for translator in translators])
+
+    # The end is the index of the last point, or 0 if it is not found. The beginning is the index
+    # of the first point if it is found before the end, or anywhere if the last point is not found.
+    last_found = last_indices >= 0
+    ends = np.where(last_found, last_indices, 0)
+    begins = np.where((first_indices >= 0) & (~last_found | (first_indices <= last_indices)), first_indices, 0)
+
+    selection_sizes = ends + 1 - begins
+    if (selection_sizes <= 0).any():
+        raise ZeroDivisionError('An occurrence of the pattern has an empty selection in the dataset')
+
+    return pattern_size / int(selection_sizes.min())
+
+
+def compute_max_compactness_by_scanning(tec, d):
+    """ Computes the maximum compactness of any occurrence of the pattern of the TEC by finding
+        each occurrence in d with heuristics.find_pattern_indices. """
 
     max_comp = 0
     pattern_size = len(tec.get_pattern())
 
-    for translator in tec.get_translators():
+    for translator in occurrence_translators(tec):
         transl_pattern = [v + translator for v in tec.get_pattern()]
         begin, end = heuristics.find_pattern_indices(transl_pattern, d)
         compactness = heuristics.compactness(begin, end, pattern_size, d)
@@ -735,95 +1113,141 @@ def compute_max_compactness(tec, d):
     return max_comp
 
 
+def occurrence_translators(tec):
+    """ Returns the translators of the TEC with the zero vector added if they do not contain it. """
+
+    translators = tec.get_translators()
+    zero_vector = Vector.zero_vector(tec.get_pattern()[0].dimensionality())
+    if zero_vector not in translators:
+        translators = translators + [zero_vector]
+
+    return translators
+
+
 def forth_cover(d, tecs, tec_saliences, c_min, sigma_min):
     """ Finds the a cover from the TECs. Based on the pseudocode in [Meredith2016] Fig. 13.10.
         Modified to return the primary and secondary TECs as separate lists instead of returning a list of lists
-        of sets (TEC coverages). """
+        of sets (TEC coverages). The coverages are handled as bitsets over the indices of the points in d,
+        extended with indices for the covered points that are not in d.
+
+        The number of points each TEC would add to the cover is updated through an inverted index from
+        the points to the TECs that cover them when points get covered. As these numbers only decrease,
+        the TEC with the greatest weighed salience is found from a max-heap whose entries are refreshed when
+        they reach the top. Of equally salient TECs the first one is selected. TECs that would add fewer than
+        c_min points can never be selected again and are dropped. """
+
+    coverages, index_count = extended_coverages(tecs, d)
+    all_points = bitset.of_points(d, d)
+    tecs_of_points = TECsOfPoints([bitset.to_indices(coverage) for coverage in coverages], index_count)
+    new_point_counts = np.array([bitset.popcount(coverage) for coverage in coverages], dtype=np.int64)
+
+    candidates = []
+    for i in range(len(tecs)):
+        heappush(candidates, (-(int(new_point_counts[i]) * tec_saliences[i]), i))
 
     selected_tecs = []
+    points_covered = 0
+
+    while not is_dataset_covered(points_covered, all_points) and candidates:
+        negated_salience, i = heappop(candidates)
+        num_new_points_in_cover = int(new_point_counts[i])
+        if num_new_points_in_cover < c_min:
+            continue
+
+        weighed_salience = num_new_points_in_cover * tec_saliences[i]
+        if -negated_salience != weighed_salience:
+            heappush(candidates, (-weighed_salience, i))
+            continue
+
+        if weighed_salience <= 0:
+            break
+
+        best_tec = tecs[i]
+        best_coverage = coverages[i]
+        new_points = bitset.and_not(best_coverage, points_covered)
+        points_covered = bitset.union(points_covered, best_coverage)
+        new_point_counts -= tecs_of_points.counts(bitset.to_indices(new_points), len(tecs))
+
+        j = 0
+        primary_found = False
+        while not primary_found and j < len(selected_tecs):
+            primary_coverage = selected_tecs[j][0][1]
+            if bitset.popcount(bitset.intersection(primary_coverage, best_coverage)) \
+                    / bitset.popcount(primary_coverage) > sigma_min:
+                selected_tecs[j].append((best_tec, best_coverage))
+                primary_found = True
+            j += 1
 
-    points_covered = set()
-    found = True
-
-    while not is_dataset_covered(points_covered, d) and found:
-        found = False
-        max_salience = 0
-        best_tec = None
-        index_of_best = None
-        indexes_of_removable = []
-        for i in range(len(tecs)):
-            num_new_points_in_cover = len(tecs[i].coverage() - points_covered)
-            if num_new_points_in_cover < c_min:
-                indexes_of_removable.append(i)
-                continue
-            weighed_salience = num_new_points_in_cover * tec_saliences[i]
-            if weighed_salience > max_salience:
-                max_salience = weighed_salience
-                best_tec = tecs[i]
-                index_of_best = i
-
-        if best_tec:
-            indexes_of_removable.append(index_of_best)
-            found = True
-            points_covered = points_covered | best_tec.coverage()
-            i = 0
-            primary_found = False
-            while not primary_found and i < len(selected_tecs):
-                if len((selected_tecs[i][0].coverage() & best_tec.coverage())) / len(selected_tecs[i][0].coverage()) > sigma_min:
-                    selected_tecs[i].append(best_tec)
-                    primary_found = True
-                i += 1
-
-            if not primary_found:
-                selected_tecs.append([best_tec])
-
-            remove_from_saliences = []
-            remove_from_tecs = []
-            for index in indexes_of_removable:
-                remove_from_saliences.append(tec_saliences[index])
-                remove_from_tecs.append(tecs[index])
-
-            for removable in remove_from_saliences:
-                tec_saliences.remove(removable)
-
-            for removable in remove_from_tecs:
-                tecs.remove(removable)
+        if not primary_found:
+            selected_tecs.append([(best_tec, best_coverage)])
 
     primary_tecs = []
     secondary_tecs = []
 
     for tec_list in selected_tecs:
-        primary_tecs.append(tec_list[0])
-        secondary_tecs.append(tec_list[1:len(tec_list)])
+        primary_tecs.append(tec_list[0][0])
+        secondary_tecs.append([tec for tec, _ in tec_list[1:len(tec_list)]])
 
     return primary_tecs, secondary_tecs
 
 
-def is_dataset_covered(P, d):
-    for point in d:
-        if point not in P:
-            return False
+class TECsOfPoints:
+    """ Inverted index from the indices of points to the indices of the TECs that cover them,
+        stored in compressed sparse row layout. """
+
+    _offsets = None
+    _tec_indices = None
+
+    def __init__(self, coverage_indices, point_count):
+        """ coverage_indices holds for each TEC the indices of the points it covers. """
+
+        lengths = np.array([len(indices) for indices in coverage_indices], dtype=np.int64)
+        points = np.concatenate([np.zeros(0, dtype=np.int64)] + [np.asarray(indices, dtype=np.int64)
+                                                                 for indices in coverage_indices])
+        tec_indices = np.repeat(np.arange(len(coverage_indices)), lengths)
+
+        order = np.argsort(points, kind='stable')
+        self._tec_indices = tec_indices[order]
+        self._offsets = np.searchsorted(points[order], np.arange(point_count + 1))
+
+    def counts(self, point_indices, tec_count):
+        """ Returns for each TEC the number of the given points it covers as an array. """
+
+        point_indices = np.asarray(point_indices, dtype=np.int64)
+        begins = self._offsets[point_indices]
+        lengths = self._offsets[point_indices + 1] - begins
+        positions = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) \
+            + np.repeat(begins, lengths)
+        return np.bincount(self._tec_indices[positions], minlength=tec_count)
 
-    return True
+
+def is_dataset_covered(covered_points, all_points):
+    """ Returns True if the bitset covered_points contains all points of the bitset all_points. """
+    return bitset.and_not(all_points, covered_points) == 0
 
 
 def siatech_compress(d):
-    """ Implements SIATECCompress as defined in [Meredith2016] but uses SIATECH. """
+    """ Implements SIATECCompress as defined in [Meredith2016] but uses SIATECH.
+        The covered points are tracked as in compute_encoding. """
 
     tecs = siatech(d)
     sort_tecs_by_quality(tecs, d)
 
-    covered_points = set()
+    covered_points = 0
+    outside_covered_points = set()
     best_tecs = []
     for tec in tecs:
-        new_points = tec.coverage() - covered_points
-        if len(new_points) > len(tec.get_pattern()) + len(tec.get_translators()):
+        tec_coverage, outside_tec_coverage = split_coverage(tec, d)
+        new_points = bitset.and_not(tec_coverage, covered_points)
+        outside_new_points = outside_tec_coverage - outside_covered_points
+        if bitset.popcount(new_points) + len(outside_new_points) > tec.pattern_size() + tec.translator_count():
             best_tecs.append(tec)
-            covered_points = covered_points | tec.coverage()
-            if len(covered_points) == len(d):
+            covered_points = bitset.union(covered_points, tec_coverage)
+            outside_covered_points |= outside_new_points
+            if bitset.popcount(covered_points) + len(outside_covered_points) == len(d):
                 break
 
-    residual = set(d) - set(covered_points)
+    residual = set([p for p in set(d) if not bitset.contains(covered_points, d.index_of(p))])
     if residual:
         best_tecs.append(TEC(list(residual), [], []))
 
@@ -845,6 +1269,75 @@ def cosiatech(d):
     return best_tecs
 
 
+def cosiatech_incremental(d):
+    """ Implements COSIATEC with SIATECH, but instead of running SIATECH again on the remaining points
+        in every iteration, updates an IncrementalMTPIndex by removing the covered points from it.
+        Returns the same TECs as cosiatech. Datasets with repeated points are encoded with cosiatech. """
+
+    d = Dataset.sort_ascending(d)
+    if not d.has_unique_vectors():
+        return cosiatech(d)
+
+    index = IncrementalMTPIndex(d)
+    quality_keys = {}
+    candidates = []
+    best_tecs = []
+
+    while len(index) > 1:
+        for vectorized_pattern in index.pop_changed():
+            quality_keys[vectorized_pattern] = tec_quality_key(index.tec(vectorized_pattern), d)
+            heappush(candidates, Candidate(quality_keys[vectorized_pattern], index.order(vectorized_pattern),
+                                           vectorized_pattern))
+
+        # The first of the equally good TECs in the order of SIATECH is the best one. Entries of classes
+        # that have changed or been removed since they were pushed are discarded when they reach the top.
+        while not candidates[0].is_current(index, quality_keys):
+            heappop(candidates)
+
+        best = candidates[0].get_vectorized_pattern()
+        best_tecs.append(index.tec(best, relative_indices=True))
+        index.remove_points(bitset.to_indices(index.coverage(best)))
+
+    if len(index) == 1:
+        point = [p for p in d if index.contains(d.index_of(p))][0]
+        best_tecs.append(TEC([point], [0], [Vector.zero_vector(point.dimensionality())]))
+
+    return best_tecs
+
+
+class Candidate:
+    """ Entry of the heap of TEC classes in cosiatech_incremental. The entries are ordered by the quality
+        of the TEC and, among equally good TECs, by the position of the TEC in the output of SIATECH.
+        Only the criteria needed to tell two TECs apart are computed. """
+
+    _quality_key = None
+    _order = None
+    _vectorized_pattern = None
+
+    def __init__(self, quality_key, order, vectorized_pattern):
+        self._quality_key = quality_key
+        self._order = order
+        self._vectorized_pattern = vectorized_pattern
+
+    def get_vectorized_pattern(self):
+        return self._vectorized_pattern
+
+    def __lt__(self, other):
+        if self._quality_key < other._quality_key:
+            return True
+        if other._quality_key < self._quality_key:
+            return False
+
+        return self._order < other._order
+
+    def is_current(self, index, quality_keys):
+        """ Returns True if the class has not changed or been removed since the entry was pushed. """
+
+        vectorized_pattern = self._vectorized_pattern
+        return vectorized_pattern in index.classes() and quality_keys[vectorized_pattern] is self._quality_key \
+            and index.order(vectorized_pattern) == self._order
+
+
 def forths_algorithmh(d, c_min, sigma_min):
     """ Implements Forth's algorithm [Forth2012], [Meredith2016].
         Returns two lists of TECs, primary and secondary TECs. """
@@ -0,0 +1,231 @@
+import numpy as np
+from vector import Vector
+from dataset import detect_resolution, dataset_to_array, dequantize_component
+from numpy_engine import row_blocks, block_pairs, CSRMTPMap, MAX_BLOCK_PAIRS
+import parallel
+
+
+""" Contains a compact map of difference vectors and index pairs for datasets on a grid.
+    Each difference vector is encoded into a single 64 bit integer key and the index pairs
+    are stored in flat arrays in compressed sparse row (CSR) layout. """
+
+
+# Number of row ranges per process when the map is built in parallel.
+SHARDS_PER_PROCESS = 4
+
+
+class KeyEncoder:
+    """ Encodes the integer difference vectors between points of a point set into single integers.
+        The first component is the most significant, so the order of the keys is the
+        lexicographical order of the difference vectors.
+        If the points are given in grid coordinates, resolution holds the grid resolution of
+        each dimension, and the vectors that are encoded and decoded are in the original coordinates. """
+
+    _spans = None
+    _multipliers = None
+    _center = 0
+    _resolution = None
+
+    def __init__(self, points, resolution=None):
+        """ points is an (n, k) array of integers. """
+
+        if points.dtype.kind not in 'iu':
+            raise ValueError('Difference vectors can only be packed for integer coordinates, '
+                             'quantize the dataset first')
+
+        spans = (points.max(axis=0) - points.min(axis=0)).tolist() if len(points) else [0] * points.shape[1]
+        multipliers = [0 for _ in spans]
+        multiplier = 1
+        for i in range(len(spans) - 1, -1, -1):
+            multipliers[i] = multiplier
+            multiplier *= 2 * spans[i] + 1
+
+        if multiplier >= 2 ** 63:
+            raise ValueError('Range of the difference vectors is too large to pack them into 64 bit keys')
+
+        self._spans = spans
+        self._multipliers = multipliers
+        self._resolution = resolution
+        self._center = sum([s * m for s, m in zip(spans, multipliers)])
+
+    def point_keys(self, points):
+        """ Returns the linear part of the key for each point, so that the key of the
+            difference vector q - p is point_keys(q) - point_keys(p) + center. """
+
+        return points.astype(np.int64) @ np.array(self._multipliers, dtype=np.int64)
+
+    def get_center(self):
+        return self._center
+
+    def encode(self, vector):
+        """ Returns the key of a difference vector, or None if the vector cannot
+            be a difference vector of the point set. """
+
+        components = vector.components()
+        if self._resolution is not None:
+            # The differences of floats on a decimal grid are multiples of the resolution only up to rounding.
+            components = [_grid_multiple(c, step) for c, step in zip(components, self._resolution)]
+
+        key = self._center
+        for c, span, multiplier in zip(components, self._spans, self._multipliers):
+            if c is None or c != int(c) or abs(c) > span:
+                return None
+            key += int(c) * multiplier
+
+        return key
+
+    def decode(self, key):
+        """ Returns the difference vector of a key. """
+
+        key = int(key)
+        components = []
+        for span, multiplier in zip(self._spans, self._multipliers):
+            digit, key = divmod(key, multiplier)
+            components.append(digit - span)
+
+        if self._resolution is not None:
+            components = [dequantize_component(c, step) for c, step in zip(components, self._resolution)]
+
+        return Vector(components)
+
+
+def _grid_multiple(component, step):
+    multiple = round(component / step)
+    if abs(multiple * step - component) > 1e-9 * max(1, abs(component)):
+        return None
+
+    return multiple
+
+
+class PackedMTPMap(CSRMTPMap):
+    """ CSRMTPMap whose groups are the difference vectors in ascending order of their keys. The dataset must be
+        quantized or have its components on a grid whose resolution can be detected. On a decimal grid,
+        the differences of the floats that differ only by rounding errors are a single difference vector,
+        so the map is then not the same as the dictionary, see Dataset.has_exact_differences. """
+
+    _encoder = None
+    _keys = None
+
+    def __init__(self, sorted_dataset, max_block_pairs=MAX_BLOCK_PAIRS, processes=1):
+        """ If processes is other than 1, the rows of the difference vector table are split between
+            that many processes (None uses all CPUs). """
+
+        points = dataset_to_array(sorted_dataset)
+        resolution = None
+        if points.dtype.kind == 'f' and len(points):
+            resolution = detect_resolution([sorted_dataset[i] for i in range(len(sorted_dataset))])
+            points = np.rint(points / resolution).astype(np.int64)
+
+        n = len(points)
+        self._encoder = KeyEncoder(points, resolution)
+        point_keys = self._encoder.point_keys(points)
+
+        if processes == 1 or n < 2:
+            keys, starts, ends = self._compute_sorted_pairs(point_keys, max_block_pairs)
+        else:
+            keys, starts, ends = self._compute_sorted_pairs_parallel(point_keys, processes)
+
+        group_starts = np.flatnonzero(np.diff(keys)) + 1
+        group_starts = np.concatenate((np.zeros(min(len(keys), 1), dtype=np.int64), group_starts))
+        self._keys = keys[group_starts]
+        self._offsets = np.append(group_starts, len(keys))
+        self._starts = starts
+        self._ends = ends
+
+        # The first pair of each group is the first occurrence of the difference vector.
+        first_starts = starts[group_starts].astype(np.int64)
+        first_ends = ends[group_starts].astype(np.int64)
+        self._iteration_order = np.lexsort((first_ends, first_starts))
+
+    def _compute_sorted_pairs(self, point_keys, max_block_pairs):
+        """ Returns the keys of all pairs of points and their starting and ending indices
+            in ascending order of the keys. Pairs with the same key are in row major order. """
+
+        n = len(point_keys)
+        key_blocks = [np.zeros(0, dtype=np.int64)]
+        start_blocks = [np.zeros(0, dtype=np.int32)]
+        end_blocks = [np.zeros(0, dtype=np.int32)]
+
+        for begin, end in row_blocks(n, max_block_pairs):
+            starts, ends = block_pairs(n, begin, end)
+            key_blocks.append(point_keys[ends] - point_keys[starts] + self._encoder.get_center())
+            start_blocks.append(starts.astype(np.int32))
+            end_blocks.append(ends.astype(np.int32))
+
+        keys = np.concatenate(key_blocks)
+        # Stable sorting keeps the pairs of each difference vector in ascending order.
+        order = np.argsort(keys, kind='stable')
+        return keys[order], np.concatenate(start_blocks)[order], np.concatenate(end_blocks)[order]
+
+    def _compute_sorted_pairs_parallel(self, point_keys, processes):
+        """ Computes the same arrays as _compute_sorted_pairs by sorting the pairs of ranges
+            of rows in a pool of processes. Each process writes its sorted range into arrays in shared memory,
+            and the sorted ranges are then merged by a stable sort, which keeps the pairs with the same key
+            in the order of the rows. """
+
+        n = len(point_keys)
+        pair_count = n * (n - 1) // 2
+        row_ranges = parallel.balanced_row_ranges(n, parallel.process_count(processes) * SHARDS_PER_PROCESS)
+
+        keys = parallel.shared_array(pair_count, np.int64)
+        starts = parallel.shared_array(pair_count, np.int32)
+        ends = parallel.shared_array(pair_count, np.int32)
+        state = (point_keys, self._encoder.get_center(), (keys, starts, ends) if parallel.uses_fork() else None)
+
+        for row_range, result in zip(row_ranges, parallel.imap_with_shared_state(
+                _sort_pairs_of_rows, row_ranges, state, processes)):
+            if result is not None:
+                offset = _pair_offset(n, row_range[0])
+                keys[offset:offset + len(result[0])] = result[0]
+                starts[offset:offset + len(result[0])] = result[1]
+                ends[offset:offset + len(result[0])] = result[2]
+
+        # Timsort merges the sorted runs of the row ranges.
+        order = np.argsort(keys, kind='stable')
+        return keys[order], starts[order], ends[order]
+
+    def _group(self, diff):
+        key = self._encoder.encode(diff)
+        if key is None:
+            return None
+
+        g = int(np.searchsorted(self._keys, key))
+        if g < len(self._keys) and self._keys[g] == key:
+            return g
+
+        return None
+
+    def _diff(self, g):
+        return self._encoder.decode(self._keys[g])
+
+    def _diff_nbytes(self):
+        return self._keys.nbytes
+
+
+def _pair_offset(n, row):
+    """ Returns the position of the first pair of the row in the row major order of the upper triangle. """
+    return row * (n - 1) - row * (row - 1) // 2
+
+
+def _sort_pairs_of_rows(row_range):
+    """ Sorts the pairs of a range of rows by their keys. The sorted pairs are written into the shared arrays
+        if the process is forked and returned otherwise. """
+
+    point_keys, center, shared_arrays = parallel.shared_state()
+    n = len(point_keys)
+
+    starts, ends = block_pairs(n, row_range[0], row_range[1])
+    keys = point_keys[ends] - point_keys[starts] + center
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = starts[order].astype(np.int32)
+    ends = ends[order].astype(np.int32)
+
+    if shared_arrays is None:
+        return keys, starts, ends
+
+    offset = _pair_offset(n, row_range[0])
+    shared_arrays[0][offset:offset + len(keys)] = keys
+    shared_arrays[1][offset:offset + len(keys)] = starts
+    shared_arrays[2][offset:offset + len(keys)] = ends
+    return None
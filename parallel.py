@@ -0,0 +1,94 @@
+import multiprocessing
+import mmap
+import os
+import numpy as np
+
+
+""" Helpers for running algorithms in a pool of processes. The state shared by the tasks, such as
+    the sorted dataset, is inherited by forked worker processes copy-on-write instead of being
+    pickled for every task. On platforms without fork it is sent to each worker once. """
+
+
+_shared_state = None
+
+
+def shared_state():
+    """ Returns the state shared with the tasks running in the worker processes. """
+    return _shared_state
+
+
+def _set_shared_state(state):
+    global _shared_state
+    _shared_state = state
+
+
+def process_count(processes=None):
+    """ Returns the number of worker processes to use. """
+
+    if processes:
+        return processes
+
+    return os.cpu_count() or 1
+
+
+def uses_fork():
+    """ Returns True if the worker processes are forked, so that they see the memory of the parent process. """
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def shared_array(length, dtype):
+    """ Returns a NumPy array backed by anonymous shared memory. When the worker processes are forked,
+        what they write into the array is seen by the parent process without copying. """
+
+    dtype = np.dtype(dtype)
+    buffer = mmap.mmap(-1, max(length * dtype.itemsize, 1))
+    return np.frombuffer(buffer, dtype=dtype, count=length)
+
+
+def imap_with_shared_state(worker, tasks, state, processes=None, chunksize=1):
+    """ Applies worker to each task in a pool of processes and yields the results in the order of the tasks.
+        The workers read state with shared_state(). Idle workers take the next chunk of tasks,
+        so tasks of uneven size are balanced between the processes. """
+
+    if uses_fork():
+        context = multiprocessing.get_context('fork')
+        initializer = None
+        initargs = ()
+        _set_shared_state(state)
+    else:
+        context = multiprocessing.get_context()
+        initializer = _set_shared_state
+        initargs = (state,)
+
+    try:
+        with context.Pool(process_count(processes), initializer, initargs) as pool:
+            for result in pool.imap(worker, tasks, chunksize):
+                yield result
+    finally:
+        _set_shared_state(None)
+
+
+def map_with_shared_state(worker, tasks, state, processes=None, chunksize=1):
+    """ Applies worker to each task in a pool of processes and returns the results in the order of the tasks. """
+    return list(imap_with_shared_state(worker, tasks, state, processes, chunksize))
+
+
+def balanced_row_ranges(n, count):
+    """ Splits the rows 0..n-2 of the upper triangle of an n x n difference vector table into at most
+        count consecutive ranges [begin, end) that have about the same number of pairs. """
+
+    total = n * (n - 1) // 2
+    ranges = []
+    begin = 0
+    pairs = 0
+
+    for i in range(n - 1):
+        pairs += n - 1 - i
+        if pairs * count >= total * (len(ranges) + 1):
+            ranges.append((begin, i + 1))
+            begin = i + 1
+
+    if begin < n - 1:
+        ranges.append((begin, n - 1))
+
+    return ranges
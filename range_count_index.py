@@ -0,0 +1,108 @@
+from bisect import bisect_left, bisect_right
+from dataset import dataset_to_array
+
+
+""" Contains an index for counting the points of a sorted dataset that lie within an axis aligned box. """
+
+
+class RangeCountIndex:
+    """ Merge sort tree [deBerg2008] over the points of a sorted dataset. The leaves are the points in
+        the order of the dataset, so the points whose first component is within a range are a contiguous
+        range of leaves, and every node holds the sorted second components of the points below it.
+        The number of points within a two dimensional box is found in O(log^2 n) time by binary searching
+        the O(log n) nodes that cover the range of leaves. For points of more than two dimensions, every
+        node also holds the indices of the points in the order of their second components, so the points
+        within the box of the first two components are found in O(log^2 n + h) time, where h is their
+        number, and only they are checked against the rest of the box. """
+
+    _first_components = None
+    _nodes = None
+    _node_indices = None
+    _points = None
+
+    def __init__(self, sorted_dataset):
+        points = dataset_to_array(sorted_dataset)
+        n = len(points)
+        self._points = points
+        self._first_components = points[:, 0].tolist() if n else []
+
+        if n and points.shape[1] > 2:
+            nodes = [[] for _ in range(n)] + [[(c, i)] for i, c in enumerate(points[:, 1].tolist())]
+            for i in range(n - 1, 0, -1):
+                nodes[i] = sorted(nodes[2 * i] + nodes[2 * i + 1])
+
+            self._nodes = [[c for c, _ in node] for node in nodes]
+            self._node_indices = [[i for _, i in node] for node in nodes]
+        elif n and points.shape[1] > 1:
+            second_components = points[:, 1].tolist()
+            self._nodes = [[] for _ in range(n)] + [[c] for c in second_components]
+            for i in range(n - 1, 0, -1):
+                self._nodes[i] = sorted(self._nodes[2 * i] + self._nodes[2 * i + 1])
+
+    def __len__(self):
+        return len(self._first_components)
+
+    def count(self, min_vector, max_vector):
+        """ Returns the number of points within the closed box limited by min_vector and max_vector. """
+
+        begin = bisect_left(self._first_components, min_vector[0])
+        end = bisect_right(self._first_components, max_vector[0])
+        if end <= begin:
+            return 0
+
+        if self._nodes is None:
+            return end - begin
+
+        if self._node_indices is None:
+            return self._count_second_components(begin, end, min_vector[1], max_vector[1])
+
+        indices = self._find_second_components(begin, end, min_vector[1], max_vector[1])
+        if not indices:
+            return 0
+
+        rest = self._points[indices, 2:]
+        within = ((rest >= min_vector.components()[2:]) & (rest <= max_vector.components()[2:])).all(axis=1)
+        return int(within.sum())
+
+    def _count_second_components(self, begin, end, low, high):
+        """ Counts the points in the range [begin, end) of leaves whose second component is within [low, high]. """
+
+        count = 0
+        for node in self._covering_nodes(begin, end):
+            count += bisect_right(self._nodes[node], high) - bisect_left(self._nodes[node], low)
+
+        return count
+
+    def _find_second_components(self, begin, end, low, high):
+        """ Returns the indices of the points in the range [begin, end) of leaves whose second component
+            is within [low, high]. """
+
+        indices = []
+        for node in self._covering_nodes(begin, end):
+            second_components = self._nodes[node]
+            indices += self._node_indices[node][bisect_left(second_components, low):
+                                                bisect_right(second_components, high)]
+
+        return indices
+
+    def _covering_nodes(self, begin, end):
+        """ Generates the nodes whose leaves together are the range [begin, end) of leaves. """
+
+        n = len(self._first_components)
+        begin += n
+        end += n
+
+        while begin < end:
+            if begin & 1:
+                yield begin
+                begin += 1
+            if end & 1:
+                end -= 1
+                yield end
+            begin >>= 1
+            end >>= 1
+
+
+def range_count_index(sorted_dataset):
+    """ Returns the RangeCountIndex of the sorted dataset. The index is built once and cached in the dataset. """
+    return sorted_dataset.get_cached('range_count_index', RangeCountIndex)
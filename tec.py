@@ -1,4 +1,6 @@
+import numpy as np
 from vector import Vector
+from dataset import dataset_to_array
 
 
 class TEC:
@@ -24,6 +26,12 @@ class TEC:
     def get_translators(self):
         return self._translators
 
+    def pattern_size(self):
+        return len(self._pattern)
+
+    def translator_count(self):
+        return len(self._translators)
+
     def __lt__(self, other):
         if len(self._pattern) < len(other.get_pattern()):
             return True
@@ -94,3 +102,100 @@ class TEC:
 
         self._coverage = covered_points
         return self._coverage
+
+    def coverage_size(self):
+        return len(self.coverage())
+
+
+class IndexedTEC:
+    """ A TEC that refers to the points of a sorted dataset by their indices.
+        The occurrences of the pattern are stored as a (translator count, pattern size) array of
+        dataset indices, whose first row is the pattern itself when the translators contain the zero vector.
+        The pattern, translators and coverage are materialized as vectors only when they are asked for,
+        and the heuristics that only need their sizes or bounding box are computed from the indices. """
+
+    _dataset = None
+    _pattern_indices = None
+    _occurrences = None
+    _coverage_indices = None
+
+    def __init__(self, sorted_dataset, pattern_indices, occurrences):
+        """ pattern_indices is an ascending sequence of indices of the pattern points in sorted_dataset
+            and occurrences[t][i] is the index of the ith pattern point translated by the tth translator. """
+
+        self._dataset = sorted_dataset
+        self._pattern_indices = np.asarray(pattern_indices, dtype=np.int32)
+        self._occurrences = np.asarray(occurrences, dtype=np.int32).reshape(-1, len(self._pattern_indices))
+
+    def get_dataset(self):
+        return self._dataset
+
+    def get_pattern(self):
+        return [self._dataset[i] for i in self._pattern_indices.tolist()]
+
+    def get_pattern_indices(self):
+        return self._pattern_indices.tolist()
+
+    def get_translators(self):
+        # The translators are computed from the last pattern point as in SIATECH, as the differences of
+        # float components depend on the points they are computed from.
+        last = self._dataset[int(self._pattern_indices[-1])]
+        return [self._dataset[i] - last for i in self._occurrences[:, -1].tolist()]
+
+    def get_translator_indices(self):
+        """ Returns the indices of the points onto which the translators translate the first pattern point. """
+        return self._occurrences[:, 0]
+
+    def get_occurrences(self):
+        return self._occurrences
+
+    def pattern_size(self):
+        return len(self._pattern_indices)
+
+    def translator_count(self):
+        return len(self._occurrences)
+
+    def __lt__(self, other):
+        if self.pattern_size() < other.pattern_size():
+            return True
+        if self.pattern_size() > other.pattern_size():
+            return False
+
+        return self.get_pattern() < other.get_pattern()
+
+    def __str__(self):
+        return Vector.vector_set_to_str(sorted(self.get_pattern())) + ', ' \
+            + Vector.vector_set_to_str(sorted(self.get_translators()))
+
+    def __eq__(self, other):
+        if self.pattern_size() != other.pattern_size():
+            return False
+
+        if self.translator_count() != other.translator_count():
+            return False
+
+        return self.coverage() == other.coverage()
+
+    def get_bounding_box(self):
+        """ Returns the vectors that limit the minimum axis aligned bounding box of
+            the pattern of the TEC.
+            Returns two vectors: min_vector, max_vector """
+
+        points = dataset_to_array(self._dataset)[self._pattern_indices]
+        return Vector(points.min(axis=0).tolist()), Vector(points.max(axis=0).tolist())
+
+    def coverage_indices(self):
+        """ Returns the ascending indices of the points covered by the TEC as an array. """
+
+        if self._coverage_indices is None:
+            self._coverage_indices = np.union1d(self._occurrences.ravel(), self._pattern_indices)
+
+        return self._coverage_indices
+
+    def coverage_size(self):
+        return len(self.coverage_indices())
+
+    def coverage(self):
+        """ Returns the set of points covered by the TEC as defined in eq. 4 of [Meredith2013]. """
+        return set([self._dataset[i] for i in self.coverage_indices().tolist()])
+
@@ -0,0 +1,37 @@
+import unittest
+from dataset import Dataset
+from tec import TEC, IndexedTEC
+import bitset
+
+
+class BitsetTests(unittest.TestCase):
+
+    def test_from_indices(self):
+        bits = bitset.from_indices([0, 3, 9], 12)
+        self.assertEqual(bits, 1 + 8 + 512)
+        self.assertEqual(bitset.to_indices(bits), [0, 3, 9])
+        self.assertEqual(bitset.to_indices(0), [])
+
+    def test_operations(self):
+        bits1 = bitset.from_indices([0, 1, 2, 70], 80)
+        bits2 = bitset.from_indices([2, 3, 70], 80)
+
+        self.assertEqual(bitset.popcount(bits1), 4)
+        self.assertEqual(bitset.to_indices(bitset.union(bits1, bits2)), [0, 1, 2, 3, 70])
+        self.assertEqual(bitset.to_indices(bitset.intersection(bits1, bits2)), [2, 70])
+        self.assertEqual(bitset.to_indices(bitset.and_not(bits1, bits2)), [0, 1])
+        self.assertTrue(bitset.contains(bits1, 70))
+        self.assertFalse(bitset.contains(bits1, 3))
+
+    def test_coverage(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/bach_wtk_excerpt.csv'))
+        translator = dataset[1] - dataset[0]
+        tec = TEC([dataset[0]], [0], [translator - translator, translator])
+        indexed_tec = IndexedTEC(dataset, [0], [[0], [1]])
+
+        self.assertEqual(bitset.coverage(tec, dataset), 3)
+        self.assertEqual(bitset.coverage(indexed_tec, dataset), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
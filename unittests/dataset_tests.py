@@ -1,6 +1,8 @@
 import unittest
+import math
 from dataset import Dataset
 from vector import Vector
+import new_algorithms
 
 
 class DatasetTest(unittest.TestCase):
@@ -13,6 +15,77 @@ class DatasetTest(unittest.TestCase):
         self.assertEqual(Vector([0, 0, 0]), dataset[2])
         self.assertEqual(Vector([-1, -2, -1234.1234]), dataset[3])
 
+    def test_quantize_detects_resolution(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        quantized = Dataset.quantize(dataset)
+
+        self.assertTrue(quantized.is_quantized())
+        self.assertEqual(quantized.get_resolution(), (0.25, 0.25))
+        for i in range(len(dataset)):
+            self.assertTrue(all(isinstance(c, int) for c in quantized[i].components()))
+            self.assertEqual(quantized.dequantize(quantized[i]), dataset[i])
+
+    def test_quantize_with_given_resolution(self):
+        dataset = Dataset('testfiles/bach_wtk_excerpt.csv')
+        quantized = Dataset.quantize(dataset, [0.5, 1])
+        self.assertEqual(quantized[1], Vector([2, 64]))
+        self.assertRaises(ValueError, Dataset.quantize, dataset, 2)
+
+    def test_quantize_detects_decimal_resolution(self):
+        dataset = Dataset('testfiles/float_grid_150.csv')
+        quantized = Dataset.quantize(dataset)
+
+        self.assertEqual(quantized.get_resolution(), (0.1, 0.1))
+        for i in range(len(dataset)):
+            self.assertEqual(quantized.dequantize(quantized[i]), dataset[i])
+
+        self.assertFalse(dataset.has_exact_differences())
+        self.assertTrue(quantized.has_exact_differences())
+        self.assertTrue(Dataset('testfiles/random_patterns/rand_patterns_100.csv').has_exact_differences())
+
+    def test_quantize_detects_resolution_of_thirds(self):
+        dataset = Dataset.from_vectors([Vector([i / 3, 60 + i % 4]) for i in range(12)])
+        quantized = Dataset.quantize(dataset)
+
+        self.assertEqual(quantized.get_resolution(), (1 / 3, 1.0))
+        self.assertEqual(quantized[5], Vector([5, 61]))
+        for i in range(len(dataset)):
+            self.assertEqual(quantized.dequantize(quantized[i]), dataset[i])
+
+    def test_quantize_fails_without_grid(self):
+        dataset = Dataset.from_vectors([Vector([i * math.sqrt(2), 60]) for i in range(10)])
+        self.assertRaises(ValueError, Dataset.quantize, dataset)
+
+        # The components of 0.01 steps need a resolution of 1/100, which can be detected.
+        dataset = Dataset('experiment_datasets/MTP_algorithm_test_datasets/mtp_count_max/mtp_count_max_1000.csv')
+        self.assertEqual(Dataset.quantize(dataset).get_resolution(), (1.0, 0.01))
+
+    def test_mtps_of_quantized_dataset(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        quantized = Dataset.quantize(dataset)
+
+        expected = new_algorithms.siah(dataset)
+        result = [(quantized.dequantize(diff), [quantized.dequantize(p) for p in points])
+                  for diff, points in new_algorithms.siah(quantized)]
+        self.assertEqual(result, expected)
+
+    def test_index_of(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/bach_wtk_excerpt.csv'))
+        for i in range(len(dataset)):
+            self.assertEqual(dataset.index_of(dataset[i]), i)
+
+        self.assertRaises(ValueError, dataset.index_of, Vector([-1, -1]))
+
+    def test_indices_of(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/bach_wtk_excerpt.csv'))
+        self.assertTrue(dataset.has_unique_vectors())
+        self.assertEqual(dataset.indices_of([dataset[2], Vector([-1, -1]), dataset[0]]).tolist(), [2, -1, 0])
+
+    def test_is_sorted(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        self.assertFalse(dataset.is_sorted())
+        self.assertTrue(Dataset.sort_ascending(dataset).is_sorted())
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,8 +1,9 @@
 import unittest
-from tec import TEC
+from tec import TEC, IndexedTEC
 from vector import Vector
 from dataset import Dataset
 import heuristics
+import new_algorithms
 
 
 class HeuristicTest(unittest.TestCase):
@@ -21,6 +22,40 @@ class HeuristicTest(unittest.TestCase):
         tec = TEC([Vector([2, -1, 0]), Vector([-1, 2, -1]), Vector([0, 1, 2])], [0, 1, 2], [Vector([0, 0, 0])])
         self.assertEqual(heuristics.pattern_volume(tec), 27)
 
+    def test_indexed_tec_heuristics(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/bach_wtk_excerpt.csv'))
+        pattern_indices = [0, 2, 3]
+        pattern = [dataset[i] for i in pattern_indices]
+        tec = TEC(pattern, list(pattern_indices), [Vector([0, 0])])
+        indexed_tec = IndexedTEC(dataset, pattern_indices, [pattern_indices])
+
+        self.assertEqual(indexed_tec.get_pattern(), tec.get_pattern())
+        self.assertEqual(indexed_tec.get_translators(), tec.get_translators())
+        self.assertEqual(indexed_tec.get_bounding_box(), tec.get_bounding_box())
+        self.assertEqual(indexed_tec.coverage(), tec.coverage())
+        self.assertEqual(heuristics.compression_ratio(indexed_tec), heuristics.compression_ratio(tec))
+        self.assertEqual(heuristics.bounding_box_compactness(indexed_tec, dataset),
+                         heuristics.bounding_box_compactness(tec, dataset))
+        self.assertEqual(heuristics.pattern_volume(indexed_tec), heuristics.pattern_volume(tec))
+
+    def test_binary_search_matches_linear_scan(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        vectors = [dataset[i] for i in range(len(dataset))]
+
+        for tec in new_algorithms.siatech(dataset):
+            self.assertEqual(heuristics.bounding_box_compactness(tec, dataset),
+                             heuristics.bounding_box_compactness(tec, vectors))
+
+            for translator in tec.get_translators():
+                pattern = [p + translator for p in tec.get_pattern()]
+                self.assertEqual(heuristics.find_pattern_indices(pattern, dataset),
+                                 heuristics.find_pattern_indices(pattern, vectors))
+
+        missing = Vector([1000, 1000])
+        self.assertEqual(heuristics.find_pattern_indices([vectors[5], missing], dataset),
+                         heuristics.find_pattern_indices([vectors[5], missing], vectors))
+        self.assertEqual(heuristics.find_pattern_indices([vectors[5], vectors[2]], dataset), (0, 2))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,39 @@
+import unittest
+from dataset import Dataset
+from incremental_mtp_index import IncrementalMTPIndex
+import new_algorithms
+
+
+class IncrementalMTPIndexTests(unittest.TestCase):
+
+    def test_tecs_after_removing_points(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        index = IncrementalMTPIndex(dataset)
+        removed = list(range(0, 100, 7)) + [50, 51, 52]
+        index.remove_points(removed)
+
+        remaining = Dataset.sort_ascending(dataset)
+        remaining.remove_all([dataset[i] for i in removed])
+        expected = new_algorithms.siatech(remaining)
+
+        classes = sorted(index.classes(), key=index.order)
+        self.assertEqual(len(index), len(remaining))
+        self.assertEqual(len(classes), len(expected))
+        for vectorized_pattern, exp in zip(classes, expected):
+            tec = index.tec(vectorized_pattern, relative_indices=True)
+            self.assertEqual(tec.get_pattern(), exp.get_pattern())
+            self.assertEqual(tec.get_pattern_indices(), exp.get_pattern_indices())
+            self.assertEqual(tec.get_translators(), exp.get_translators())
+
+    def test_relative_index(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/bach_wtk_excerpt.csv'))
+        index = IncrementalMTPIndex(dataset)
+        index.remove_points([1, 3])
+
+        self.assertEqual(len(index), len(dataset) - 2)
+        self.assertFalse(index.contains(1))
+        self.assertEqual(index.relative_index(4), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ from vector import Vector
 import new_algorithms
 import orig_algorithms
 import helpers
+from pattern import Pattern
 
 
 class NewAlgorithmsTest(unittest.TestCase):
@@ -75,6 +76,138 @@ class NewAlgorithmsTest(unittest.TestCase):
         for tec in result:
             self.assertTrue(helpers.tec_in_list(tec, expected))
 
+    def test_mtp_index(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        index = new_algorithms.MTPIndex(Dataset.sort_ascending(dataset))
+
+        self.assertEqual(index.mtps(), new_algorithms.siah(dataset))
+        self.assertEqual(len(index.tecs()), len(index.unique_patterns()))
+
+    def test_parallel_siatech(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        result = new_algorithms.siatech(dataset, processes=2)
+        expected = new_algorithms.siatech(dataset)
+
+        helpers.assert_tecs_equal(self, result, expected)
+
+    def test_parallel_siatech_on_decimal_grid(self):
+        # The differences of the floats of 0.1 steps are not exact, so the map is not packed for them.
+        dataset = Dataset('testfiles/float_grid_150.csv')
+        self.assertIsNone(new_algorithms.packed_mtp_map_or_none(Dataset.sort_ascending(dataset), 2))
+        helpers.assert_tecs_equal(self, new_algorithms.siatech(dataset, processes=2), new_algorithms.siatech(dataset))
+
+        quantized = Dataset.sort_ascending(Dataset.quantize(dataset))
+        self.assertIsNotNone(new_algorithms.packed_mtp_map_or_none(quantized, 2))
+        helpers.assert_tecs_equal(self, new_algorithms.siatech(quantized, processes=2),
+                                  new_algorithms.siatech(quantized))
+
+    def test_parallel_filtered_tecs(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        index = new_algorithms.MTPIndex(dataset, processes=2)
+        result = index.filtered_tecs(2)
+        expected = new_algorithms.siatechf(dataset, 2)
+
+        helpers.assert_tecs_equal(self, result, expected)
+
+    def test_iter_siah(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        self.assertEqual(list(new_algorithms.iter_siah(dataset)), new_algorithms.siah(dataset))
+
+    def test_iter_siatech(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        expected = new_algorithms.siatech(dataset)
+
+        for processes in [1, 2]:
+            result = list(new_algorithms.iter_siatech(dataset, processes))
+            helpers.assert_tecs_equal(self, result, expected, compare_indices=True)
+
+    def test_siah_with_onset_window(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        expected = [mtp for mtp in new_algorithms.siah(dataset) if mtp[0][0] <= 3]
+        self.assertEqual(new_algorithms.siah(dataset, max_onset_diff=3), expected)
+        self.assertEqual(list(new_algorithms.iter_siah(dataset, max_onset_diff=3)), expected)
+
+    def test_siatech_with_onset_window(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        index = new_algorithms.MTPIndex(dataset)
+        result = new_algorithms.siatech(dataset, max_onset_diff=3)
+        self.assertTrue(result)
+
+        for tec in result:
+            pattern = tec.get_pattern()
+            self.assertEqual(tec.get_translators(), index.translators(pattern, Pattern(helpers.vec(pattern))))
+
+    def test_siatech_with_onset_window_and_repeated_points(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        points = [dataset[i] for i in range(len(dataset))]
+        dataset = Dataset.sort_ascending(Dataset.from_vectors(points + points[:6]))
+        index = new_algorithms.MTPIndex(dataset)
+
+        for max_onset_diff in [0, 3]:
+            result = new_algorithms.siatech(dataset, max_onset_diff=max_onset_diff)
+            self.assertTrue(result)
+            for tec in result:
+                pattern = tec.get_pattern()
+                self.assertTrue(tec.get_translators())
+                self.assertEqual(tec.get_translators(), index.translators(pattern, Pattern(helpers.vec(pattern))))
+
+    def test_siatech_with_onset_window_on_float_grid(self):
+        # Many patterns have their first vector beyond the window and a later vector within it.
+        dataset = Dataset.sort_ascending(Dataset('testfiles/float_grid_150.csv'))
+        index = new_algorithms.MTPIndex(dataset)
+        window_map = new_algorithms.OnsetWindowMTPMap(dataset, 0.3)
+
+        for tec in new_algorithms.siatech(dataset, max_onset_diff=0.3):
+            vectorized_pattern = helpers.vec(tec.get_pattern())
+            if vectorized_pattern:
+                self.assertEqual(new_algorithms.find_target_indices_h(vectorized_pattern, window_map),
+                                 new_algorithms.find_target_indices_h(vectorized_pattern, index.get_mtp_map()))
+
+    def test_onset_window_mtp_map(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        full_map = new_algorithms.compute_mtp_map(dataset)
+        window_map = new_algorithms.OnsetWindowMTPMap(dataset, 3)
+
+        self.assertEqual(list(window_map), [diff for diff in full_map if diff[0] <= 3])
+        for diff in full_map:
+            self.assertEqual(window_map[diff], full_map[diff])
+            self.assertEqual(diff in window_map, diff[0] <= 3)
+
+        diff = list(full_map)[-1]
+        starts = [index_pair[0] for index_pair in full_map[diff]]
+        ends = [index_pair[1] for index_pair in full_map[diff]]
+        self.assertEqual(window_map.pairs_from(diff, starts[1:]), full_map[diff][1:])
+        self.assertEqual(window_map.pairs_to(diff, ends[1:]), full_map[diff][1:])
+        self.assertEqual(window_map.pairs_to(diff, range(len(dataset))), full_map[diff])
+        self.assertRaises(KeyError, window_map.__getitem__, Vector([1, 1000]))
+
+    def test_siatech_indexed(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        result = new_algorithms.siatech_indexed(dataset)
+        expected = new_algorithms.siatech(dataset)
+
+        helpers.assert_tecs_equal(self, result, expected, compare_indices=True)
+        for tec, exp in zip(result, expected):
+            self.assertEqual(tec.coverage(), exp.coverage())
+
+    def test_siatech_indexed_with_repeated_points_and_floats(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        points = [dataset[i] for i in range(len(dataset))]
+
+        for dataset in [Dataset.from_vectors(points + points[::3]), Dataset('testfiles/float_grid_150.csv')]:
+            helpers.assert_tecs_equal(self, new_algorithms.siatech_indexed(dataset), new_algorithms.siatech(dataset),
+                                      compare_indices=True)
+
+    def test_siatechf_thresholds(self):
+        for file_name in ['testfiles/random_patterns/rand_patterns_100.csv', 'testfiles/float_grid_150.csv']:
+            dataset = Dataset(file_name)
+            result = new_algorithms.siatechf_thresholds(dataset, [1.5, 2, 3])
+
+            for min_cr in [1.5, 2, 3]:
+                single_threshold = new_algorithms.siatechf_thresholds(dataset, [min_cr])
+                helpers.assert_tecs_equal(self, result[min_cr], single_threshold[min_cr])
+                helpers.assert_tecs_equal(self, result[min_cr], new_algorithms.siatechf(dataset, min_cr))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
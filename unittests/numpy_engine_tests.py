@@ -0,0 +1,66 @@
+import unittest
+from dataset import Dataset
+from vector import Vector
+import new_algorithms
+import numpy_engine
+import helpers
+
+
+class NumpyEngineTest(unittest.TestCase):
+
+    def test_row_blocks(self):
+        self.assertEqual(numpy_engine.row_blocks(5, 4), [(0, 1), (1, 2), (2, 4)])
+        self.assertEqual(numpy_engine.row_blocks(5, 100), [(0, 4)])
+        self.assertEqual(numpy_engine.row_blocks(1, 100), [])
+
+    def test_block_pairs(self):
+        starts, ends = numpy_engine.block_pairs(4, 1, 3)
+        self.assertEqual(list(zip(starts.tolist(), ends.tolist())), [(1, 2), (1, 3), (2, 3)])
+
+    def test_mtp_map_matches_siatech(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        mtp_map = {}
+        for i in range(len(dataset)):
+            for j in range(i + 1, len(dataset)):
+                mtp_map.setdefault(dataset[j] - dataset[i], []).append((i, j))
+
+        result = numpy_engine.compute_mtp_map(dataset, max_block_pairs=500)
+        self.assertEqual(len(result), len(mtp_map))
+        self.assertEqual(list(result.items()), list(mtp_map.items()))
+        self.assertEqual(list(result.start_index_lists()),
+                         [[index_pair[0] for index_pair in mtp] for mtp in mtp_map.values()])
+
+    def test_mtp_map_lookup(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        mtp_map = numpy_engine.compute_mtp_map(dataset)
+
+        for diff, mtp in mtp_map.items():
+            self.assertTrue(diff in mtp_map)
+            self.assertEqual(mtp_map[diff], mtp)
+            self.assertEqual(mtp_map.pair_count(diff), len(mtp))
+            self.assertEqual(list(zip(mtp_map.starts(diff).tolist(), mtp_map.ends(diff).tolist())), mtp)
+
+        self.assertFalse(Vector([10 ** 6, 0]) in mtp_map)
+        self.assertFalse(Vector([0, 0, 0]) in mtp_map)
+        self.assertEqual(mtp_map.pair_count(Vector([10 ** 6, 0])), 0)
+        self.assertRaises(KeyError, mtp_map.__getitem__, Vector([10 ** 6, 0]))
+
+    def test_siah_np(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        self.assertEqual(numpy_engine.siah_np(dataset, max_block_pairs=300), new_algorithms.siah(dataset))
+
+    def test_siah_np_with_quantized_dataset(self):
+        dataset = Dataset.quantize(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        self.assertEqual(numpy_engine.dataset_to_array(dataset).dtype.kind, 'i')
+        self.assertEqual(numpy_engine.siah_np(dataset), new_algorithms.siah(dataset))
+
+    def test_siatech_np(self):
+        dataset = Dataset('testfiles/bach_wtk_excerpt.csv')
+        result = numpy_engine.siatech_np(dataset)
+        expected = new_algorithms.siatech(dataset)
+
+        helpers.assert_tecs_equal(self, result, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import random
+from dataset import Dataset
+from online_mtp_index import OnlineMTPIndex
+import new_algorithms
+import helpers
+
+
+class OnlineMTPIndexTests(unittest.TestCase):
+
+    def test_mtps_of_points_added_in_onset_order(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        index = OnlineMTPIndex()
+        for i in range(len(dataset)):
+            index.add_point(dataset[i])
+            if i % 25 == 24:
+                prefix = Dataset.from_vectors([dataset[j] for j in range(i + 1)])
+                self.assertEqual(index.mtps(), new_algorithms.siah(prefix))
+
+        self.assertEqual(len(index), len(dataset))
+
+    def test_tecs_of_points_added_in_any_order(self):
+        dataset = Dataset('testfiles/bach_wtk_excerpt.csv')
+        points = [dataset[i] for i in range(len(dataset))]
+        random.Random(1).shuffle(points)
+        index = OnlineMTPIndex(points)
+
+        expected = new_algorithms.siatech(dataset)
+        helpers.assert_tecs_equal(self, index.tecs(), expected, compare_indices=True)
+
+    def test_reports_while_adding_points(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        points = [dataset[i] for i in range(len(dataset))]
+        # The first points are added at the end and the rest at random positions.
+        later_points = points[40:]
+        random.Random(2).shuffle(later_points)
+        index = OnlineMTPIndex()
+
+        for i, point in enumerate(points[:40] + later_points):
+            index.add_point(point)
+            if i % 20 == 19:
+                prefix = Dataset.from_vectors((points[:40] + later_points)[:i + 1])
+                self.assertEqual(index.mtps(), new_algorithms.siah(prefix))
+
+                expected = new_algorithms.siatech(prefix)
+                helpers.assert_tecs_equal(self, index.tecs(), expected, compare_indices=True)
+
+    def test_float_points_added_in_any_order(self):
+        # The sum of a starting point and a difference vector of 0.1 steps is not always exactly the ending point.
+        dataset = Dataset('testfiles/float_grid_150.csv')
+        points = [dataset[i] for i in range(len(dataset))]
+        random.Random(1).shuffle(points)
+        index = OnlineMTPIndex(points)
+
+        self.assertEqual(index.mtps(), new_algorithms.siah(dataset))
+        helpers.assert_tecs_equal(self, index.tecs(), new_algorithms.siatech(dataset), compare_indices=True)
+
+    def test_repeated_points(self):
+        dataset = Dataset('testfiles/bach_wtk_excerpt.csv')
+        points = [dataset[i] for i in range(len(dataset))]
+        index = OnlineMTPIndex(points)
+        index.add_points(points[:3])
+
+        repeated = Dataset.from_vectors(points + points[:3])
+        self.assertEqual(index.mtps(), new_algorithms.siah(repeated))
+        self.assertEqual(len(index.tecs()), len(new_algorithms.siatech(repeated)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 from dataset import Dataset
 from vector import Vector
 import orig_algorithms
+import new_algorithms
 from tec import TEC
 import helpers
 
@@ -159,6 +160,183 @@ class OrigAlgorithmsTest(unittest.TestCase):
         for i in range(0, len(dataset)):
             self.assertTrue(dataset[i] in covered_points)
 
+    def test_compute_encoding(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/bach_wtk_excerpt.csv'))
+        tecs = orig_algorithms.siatech(dataset)
+        orig_algorithms.sort_tecs_by_quality(tecs, dataset)
+        tecs.insert(1, tecs[0])
+
+        best_tecs = orig_algorithms.compute_encoding(tecs, dataset)
+
+        # A TEC is selected only if it covers enough new points.
+        self.assertIs(best_tecs[0], tecs[0])
+        self.assertNotIn(tecs[0], best_tecs[1:])
+
+        covered_points = set()
+        for tec in best_tecs:
+            covered_points |= tec.coverage()
+        self.assertEqual(covered_points, set(dataset))
+
+    def test_siatec_compress_indexed(self):
+        for file_name in ['testfiles/bach_wtk_excerpt.csv', 'testfiles/random_patterns/rand_patterns_100.csv',
+                          'testfiles/float_grid_150.csv']:
+            dataset = Dataset(file_name)
+            expected = orig_algorithms.siatec_compress(dataset)
+            result = orig_algorithms.siatec_compress_indexed(dataset)
+
+            helpers.assert_tecs_equal(self, result, expected)
+            self.assertEqual(result, expected)
+
+    def test_cosiatech_incremental(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        result = orig_algorithms.cosiatech_incremental(dataset)
+        expected = orig_algorithms.cosiatech(dataset)
+
+        helpers.assert_tecs_equal(self, result, expected, compare_indices=True)
+
+    def test_cosiatech_incremental_with_repeated_points(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        points = [dataset[i] for i in range(len(dataset))]
+        dataset = Dataset.from_vectors(points + points[:10])
+
+        helpers.assert_tecs_equal(self, orig_algorithms.cosiatech_incremental(dataset),
+                                  orig_algorithms.cosiatech(dataset), compare_indices=True)
+
+    def test_tec_quality_key(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        tecs = orig_algorithms.siatech(dataset)[:60]
+
+        for tec1 in tecs:
+            key1 = orig_algorithms.tec_quality_key(tec1, dataset)
+            for tec2 in tecs:
+                key2 = orig_algorithms.tec_quality_key(tec2, dataset)
+                self.assertEqual(key1 < key2, orig_algorithms.is_better_tec(tec1, tec2, dataset))
+
+    def test_sort_tecs_by_quality(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        tecs = orig_algorithms.siatech(dataset)
+        orig_algorithms.sort_tecs_by_quality(tecs, dataset)
+
+        for i in range(1, len(tecs)):
+            self.assertFalse(orig_algorithms.is_better_tec(tecs[i], tecs[i - 1], dataset))
+
+    def test_forth_cover(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        tecs = orig_algorithms.siatech(dataset)
+        saliences = orig_algorithms.compute_tec_saliences(tecs, dataset)
+        tec_count = len(tecs)
+
+        primary_tecs, secondary_tecs = orig_algorithms.forth_cover(dataset, tecs, saliences, 3, 0.5)
+
+        # The first selected TEC is the first one with the greatest weighed salience.
+        weighed_saliences = [len(tecs[i].coverage()) * saliences[i] for i in range(tec_count)]
+        self.assertIs(primary_tecs[0], tecs[weighed_saliences.index(max(weighed_saliences))])
+        self.assertEqual(len(tecs), tec_count)
+
+        selected = primary_tecs + [tec for tec_list in secondary_tecs for tec in tec_list]
+        self.assertEqual(len(set([id(tec) for tec in selected])), len(selected))
+
+    def test_cover_with_inexact_components(self):
+        # On a grid of 0.1 steps the TECs cover points that are not in the dataset.
+        dataset = Dataset('testfiles/float_grid_150.csv')
+        tecs = orig_algorithms.siatech(dataset)
+        covered_points = set()
+        for tec in tecs:
+            covered_points |= tec.coverage()
+        self.assertFalse(covered_points <= set(dataset))
+
+        best_tecs = orig_algorithms.siatech_compress(dataset)
+        self.assertEqual(len(best_tecs), 15)
+        covered_points = set()
+        for tec in best_tecs:
+            covered_points |= tec.coverage()
+        self.assertTrue(set(dataset) <= covered_points)
+
+        primary_tecs, secondary_tecs = orig_algorithms.forth_cover(dataset, tecs, [1.0] * len(tecs), 3, 0.5)
+        self.assertEqual(len(primary_tecs), 44)
+        self.assertEqual(secondary_tecs, [[]] * 44)
+
+    def test_compute_max_compactness(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        vectors = [dataset[i] for i in range(len(dataset))]
+
+        for tec in orig_algorithms.siatech(dataset):
+            translators = list(tec.get_translators())
+            self.assertEqual(orig_algorithms.compute_max_compactness(tec, dataset),
+                             orig_algorithms.compute_max_compactness_by_scanning(tec, vectors))
+            self.assertEqual(tec.get_translators(), translators)
+
+        tec = TEC([dataset[0], dataset[2]], [0, 2], [])
+        self.assertEqual(orig_algorithms.compute_max_compactness(tec, dataset), 2 / 3)
+        self.assertEqual(tec.get_translators(), [])
+
+    def test_remove_trans_eq_mtps(self):
+        mcps = [([Vector([1, 1]), Vector([2, 2])], 0),
+                ([Vector([1, 2])], 1),
+                ([Vector([3, 1]), Vector([4, 2])], 2),
+                ([Vector([1, 1]), Vector([2, 3])], 3),
+                ([Vector([5, 5])], 4)]
+
+        orig_algorithms.remove_trans_eq_mtps(mcps)
+        self.assertEqual([mcp[1] for mcp in mcps], [0, 1, 3])
+
+    def test_find_mtps(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        diff_vecs = [dataset[j] - dataset[i] for i in range(0, 10) for j in range(i + 1, 10)]
+        diff_vecs.append(Vector([1000, 1000]))
+
+        mtps = orig_algorithms.find_mtps(dataset, diff_vecs)
+        self.assertEqual(mtps, [orig_algorithms.find_mtp(dataset, diff_vec) for diff_vec in diff_vecs])
+        self.assertEqual(mtps[-1], (Vector([1000, 1000]), []))
+
+    def test_count_within_pattern_diffs(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        transl_patterns = [[0, 3, 5, 9], [1], [2, 4], [10, 20, 30, 40, 50]]
+
+        within_pattern_diffs = []
+        for pattern_indices in transl_patterns:
+            for j in range(len(pattern_indices)):
+                for k in range(j + 1, len(pattern_indices)):
+                    within_pattern_diffs.append(dataset[pattern_indices[k]] - dataset[pattern_indices[j]])
+
+        expected = sorted(set(within_pattern_diffs))
+        expected = [(diff, within_pattern_diffs.count(diff)) for diff in expected]
+        expected.sort(key=lambda diff_count: diff_count[1], reverse=True)
+
+        self.assertEqual(orig_algorithms.count_within_pattern_diffs(dataset, transl_patterns), expected)
+        self.assertEqual(orig_algorithms.count_within_pattern_diffs(dataset, transl_patterns, max_block_pairs=3),
+                         expected)
+
+    def test_siar_max_mtps(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        mtps = orig_algorithms.siar(dataset, 3)
+        self.assertEqual(orig_algorithms.siar(dataset, 3, max_mtps=5), mtps[:5])
+
+    def test_compactness_trawl_indexed(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        point_indices = dataset.index_map()
+        for mtp in new_algorithms.siah(dataset):
+            for compactness_th, cardinality_th in [(0.2, 2), (0.5, 3), (1.0, 1)]:
+                self.assertEqual(orig_algorithms.compactness_trawl_indexed(mtp, point_indices, compactness_th,
+                                                                           cardinality_th),
+                                 orig_algorithms.compactness_trawl(mtp, compactness_th, cardinality_th, dataset))
+
+    def test_parallel_siact(self):
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        self.assertEqual(orig_algorithms.siact(dataset, 0.5, 2, new_algorithms.siah, processes=2),
+                         orig_algorithms.siact(dataset, 0.5, 2, new_algorithms.siah))
+
+    def test_siact_with_unsorted_dataset(self):
+        # The rows of the file are not in ascending order, and the compactness is computed in the rows as they are.
+        dataset = Dataset('testfiles/random_patterns/rand_patterns_100.csv')
+        expected = []
+        for mtp in new_algorithms.siah(dataset):
+            expected += orig_algorithms.compactness_trawl(mtp, 0.5, 2, dataset)
+
+        result = orig_algorithms.siact(dataset, 0.5, 2, new_algorithms.siah)
+        self.assertEqual(len(result), 19)
+        self.assertEqual(result, expected)
+
     def test_vec(self):
         pattern = [Vector([0, 0]), Vector([0, 2]), Vector([1, 1])]
         vec_pattern = orig_algorithms.vec(pattern)
@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+from dataset import Dataset
+from vector import Vector
+from packed_mtp_map import KeyEncoder, PackedMTPMap
+import new_algorithms
+import numpy_engine
+import helpers
+
+
+class PackedMTPMapTest(unittest.TestCase):
+
+    def setUp(self):
+        dataset = Dataset.quantize(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        self.dataset = Dataset.sort_ascending(dataset)
+
+    def test_key_encoder(self):
+        encoder = KeyEncoder(np.array([[0, 5], [3, 1], [2, 2]]))
+        for diff in [Vector([0, 0]), Vector([-3, 4]), Vector([3, -4]), Vector([1, 2])]:
+            self.assertEqual(encoder.decode(encoder.encode(diff)), diff)
+
+        self.assertTrue(encoder.encode(Vector([0, 1])) < encoder.encode(Vector([1, -4])))
+        self.assertIsNone(encoder.encode(Vector([4, 0])))
+
+    def test_key_encoder_requires_integers(self):
+        self.assertRaises(ValueError, KeyEncoder, np.array([[0.5, 1.0]]))
+
+    def test_same_as_dictionary(self):
+        mtp_map = numpy_engine.compute_mtp_map(self.dataset)
+        packed_map = PackedMTPMap(self.dataset, max_block_pairs=1000)
+
+        self.assertEqual(len(packed_map), len(mtp_map))
+        self.assertEqual(list(packed_map.items()), list(mtp_map.items()))
+        self.assertEqual(list(packed_map.start_index_lists()), list(mtp_map.start_index_lists()))
+        for diff in mtp_map:
+            self.assertEqual(packed_map.pair_count(diff), len(mtp_map[diff]))
+
+        self.assertFalse(Vector([10 ** 6, 0]) in packed_map)
+        self.assertRaises(KeyError, packed_map.__getitem__, Vector([10 ** 6, 0]))
+
+    def test_parallel_build(self):
+        packed_map = PackedMTPMap(self.dataset, processes=3)
+        self.assertEqual(list(packed_map.items()), list(PackedMTPMap(self.dataset).items()))
+
+    def test_dataset_on_grid(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        packed_map = PackedMTPMap(dataset)
+        self.assertEqual(list(packed_map.items()), list(numpy_engine.compute_mtp_map(dataset).items()))
+
+    def test_siatechf_with_packed_map(self):
+        packed_map = PackedMTPMap(self.dataset)
+        result = new_algorithms.MTPIndex(self.dataset, packed_map).filtered_tecs(2)
+        expected = new_algorithms.siatechf(self.dataset, 2)
+
+        helpers.assert_tecs_equal(self, result, expected)
+
+    def test_siatech_with_packed_map(self):
+        mtp_map = numpy_engine.compute_mtp_map(self.dataset)
+        packed_map = PackedMTPMap(self.dataset)
+
+        result = new_algorithms.tecs_from_mtp_map(packed_map, self.dataset)
+        expected = new_algorithms.siatech(self.dataset)
+        helpers.assert_tecs_equal(self, result, expected)
+
+        for tec, exp in zip(result, expected):
+            self.assertEqual(new_algorithms.cr_upper_bound(tec.get_pattern(), packed_map, self.dataset),
+                             new_algorithms.cr_upper_bound(exp.get_pattern(), mtp_map, self.dataset))
+
+
+if __name__ == '__main__':
+    unittest.main()
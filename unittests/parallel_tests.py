@@ -0,0 +1,28 @@
+import unittest
+import parallel
+
+
+def square_of_shared(x):
+    return parallel.shared_state() * x * x
+
+
+class ParallelTest(unittest.TestCase):
+
+    def test_balanced_row_ranges(self):
+        self.assertEqual(parallel.balanced_row_ranges(10, 3), [(0, 2), (2, 4), (4, 9)])
+        self.assertEqual(parallel.balanced_row_ranges(2, 4), [(0, 1)])
+        self.assertEqual(parallel.balanced_row_ranges(1, 4), [])
+
+    def test_map_with_shared_state(self):
+        self.assertEqual(parallel.map_with_shared_state(square_of_shared, range(10), 2, processes=2),
+                         [2 * x * x for x in range(10)])
+        self.assertIsNone(parallel.shared_state())
+
+    def test_shared_array(self):
+        array = parallel.shared_array(5, 'int32')
+        array[:] = 7
+        self.assertEqual(array.tolist(), [7, 7, 7, 7, 7])
+
+
+if __name__ == '__main__':
+    unittest.main()
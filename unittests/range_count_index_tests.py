@@ -0,0 +1,48 @@
+import unittest
+import random
+from dataset import Dataset
+from vector import Vector
+from range_count_index import RangeCountIndex, range_count_index
+import heuristics
+
+
+class RangeCountIndexTests(unittest.TestCase):
+
+    def test_count(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/random_patterns/rand_patterns_100.csv'))
+        index = RangeCountIndex(dataset)
+        self.assertEqual(len(index), len(dataset))
+
+        for i in range(0, len(dataset), 7):
+            for j in range(i, len(dataset), 11):
+                min_vector = Vector([min(dataset[i][0], dataset[j][0]), min(dataset[i][1], dataset[j][1])])
+                max_vector = Vector([max(dataset[i][0], dataset[j][0]), max(dataset[i][1], dataset[j][1])])
+                expected = len([p for p in dataset if heuristics.is_within_bb(p, max_vector, min_vector)])
+                self.assertEqual(index.count(min_vector, max_vector), expected)
+
+    def test_count_in_three_dimensions(self):
+        rng = random.Random(1)
+        vectors = [Vector([rng.randint(0, 20), rng.randint(0, 20), rng.randint(0, 20)]) for _ in range(200)]
+        dataset = Dataset.sort_ascending(Dataset.from_vectors(vectors))
+        index = RangeCountIndex(dataset)
+
+        for _ in range(200):
+            corners = [Vector([rng.randint(-2, 22) for _ in range(3)]) for _ in range(2)]
+            min_vector = Vector([min(c) for c in zip(corners[0].components(), corners[1].components())])
+            max_vector = Vector([max(c) for c in zip(corners[0].components(), corners[1].components())])
+            expected = len([p for p in dataset if heuristics.is_within_bb(p, max_vector, min_vector)])
+            self.assertEqual(index.count(min_vector, max_vector), expected)
+
+    def test_empty_box(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/bach_wtk_excerpt.csv'))
+        index = RangeCountIndex(dataset)
+        self.assertEqual(index.count(Vector([-2, -2]), Vector([-1, -1])), 0)
+        self.assertEqual(index.count(Vector([-100, -100]), Vector([10000, 10000])), len(dataset))
+
+    def test_index_is_cached(self):
+        dataset = Dataset.sort_ascending(Dataset('testfiles/bach_wtk_excerpt.csv'))
+        self.assertIs(range_count_index(dataset), range_count_index(dataset))
+
+
+if __name__ == '__main__':
+    unittest.main()
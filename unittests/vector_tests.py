@@ -66,6 +66,20 @@ class VectorTests(unittest.TestCase):
         self.assertEqual(Vector([0, 0, 0, 0, 0]) - Vector([1, 1, 1, 1, 1]), Vector([-1, -1, -1, -1, -1]))
         self.assertEqual(Vector([0.5, 0.5, 0.5]) - Vector([1, 1, 0.5]), Vector([-0.5, -0.5, 0]))
 
+    def test_hash(self):
+        self.assertEqual(hash(Vector([1, 2])), hash(Vector([1.0, 2.0])))
+        self.assertEqual(len({Vector([1, 2]), Vector([1.0, 2.0]), Vector([2, 1])}), 2)
+
+    def test_sort(self):
+        vectors = [Vector([1, 2]), Vector([0, 5]), Vector([1, -1])]
+        vectors.sort()
+        self.assertEqual(vectors, [Vector([0, 5]), Vector([1, -1]), Vector([1, 2])])
+
+    def test_components(self):
+        a = Vector([1, 2])
+        self.assertEqual(a.components(), (1, 2))
+        self.assertFalse(hasattr(a, '__dict__'))
+
 
 if __name__ == "__main__":
     unittest.main()
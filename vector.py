@@ -1,99 +1,93 @@
-from random_multipliers import RandMult
+from operator import add, sub
 
 
 class Vector:
     """ Defines a vector and the operations required for expressing symbolic music
-        data as vectors as defined in [Meredith2002] """
+        data as vectors as defined in [Meredith2002].
+        Vectors are immutable: the components are stored in a tuple and the hash
+        value is computed when the vector is created. """
 
-    __components = []
-    __hash_value = None
+    __slots__ = ('_components', '_hash_value')
 
     def __init__(self, components):
-        self.__components = components
+        self._components = tuple(components)
+        self._hash_value = hash(self._components)
 
     def dimensionality(self):
         """ Returns the dimensionality of the vector. """
-        return len(self.__components)
+        return len(self._components)
+
+    def components(self):
+        """ Returns the components of the vector as a tuple. """
+        return self._components
 
     def __getitem__(self, item):
         """ Returns the ith component of the vector """
-        return self.__components[item]
+        return self._components[item]
 
     def __cmp__(self, other):
         """ Vectors are compared using lexicographical ordering. """
 
-        for i in range(0, self.dimensionality()):
-            if self[i] < other[i]:
-                return -1
-            if self[i] > other[i]:
-                return 1
+        if self._components < other._components:
+            return -1
+        if self._components > other._components:
+            return 1
 
         return 0
 
     def __eq__(self, other):
-        return self.__cmp__(other) == 0
+        if not isinstance(other, Vector):
+            return NotImplemented
+        return self._components == other._components
 
     def __ne__(self, other):
-        return not self == other
+        if not isinstance(other, Vector):
+            return NotImplemented
+        return self._components != other._components
 
     def __lt__(self, other):
-        return self.__cmp__(other) < 0
+        return self._components < other._components
 
     def __le__(self, other):
-        return self.__cmp__(other) <= 0
+        return self._components <= other._components
 
     def __gt__(self, other):
-        return self.__cmp__(other) > 0
+        return self._components > other._components
 
     def __ge__(self, other):
-        return self.__cmp__(other) >= 0
+        return self._components >= other._components
 
     def __str__(self):
-        string_repr = '('
-        for i in range(0, self.dimensionality()):
-            string_repr += str(self[i]) + ', '
-
-        string_repr = string_repr[0: len(string_repr)-2] + ')'
-        return string_repr
+        return '(' + ', '.join([str(c) for c in self._components]) + ')'
 
     def __add__(self, other):
-        summed_components = []
-
-        for i in range(0, self.dimensionality()):
-            summed_components.append(self[i] + other[i])
-
-        return Vector(summed_components)
+        return Vector(map(add, self._components, other._components))
 
     def __sub__(self, other):
-        subs_components = []
-
-        for i in range(0, self.dimensionality()):
-            subs_components.append(self[i] - other[i])
-
-        return Vector(subs_components)
+        return Vector(map(sub, self._components, other._components))
 
     def is_zero(self):
-        for component in self.__components:
+        for component in self._components:
             if component != 0:
                 return False
 
         return True
 
     def __hash__(self):
-        """ A hash function based on theorem 3.1 of [Lemire2014], with K = 64, L = 32.
-            The components are handled as 64 bit floats and not 32 bit integers, so
-            this does not necessarily ensure strongly universal hashing. """
+        """ The hash value of the component tuple, computed once when the vector is created.
+            Equal vectors have equal components, so they hash equally also when
+            some of the components are ints and the others floats. """
 
-        if not self.__hash_value:
-            s = RandMult().multiplier(0)
-            i = 1
-            for d in self.__components:
-                s += RandMult().multiplier(i) * d
-                i += 1
+        return self._hash_value
 
-            self.__hash_value = int(s % 2**64 / 2**31)
+    def __copy__(self):
+        return self
 
-        return self.__hash_value
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return Vector, (self._components,)
 
     @staticmethod
     def vector_set_to_str(vector_set):
@@ -109,4 +103,3 @@ class Vector:
     @staticmethod
     def zero_vector(dimensionality):
         return Vector([0 for _ in range(dimensionality)])
-